@@ -0,0 +1,49 @@
+# Copyright (C) 2024  Jose Ángel Pérez Garrido
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# Compares the nodes expanded by the bidirectional searches with astar_search and
+# uniform-cost search on generated maps. Run from the repository root:
+#   python -m benchmarks.bidirectional [sizes...]
+
+import sys
+from aima.search import astar_search
+from src.heuristic_functions import h1
+from src.bucketsearch import uniform_cost_search
+from src.bidirectional import bidirectional_astar_search, bidirectional_uniform_cost_search
+from .common import random_problem
+
+def expanded(method, m_size, h_function=None):
+    # Cost of the solution and number of nodes expanded by a method
+    is_solved, solution, explored, frontier = method(random_problem(m_size, h_function))
+    return solution.path_cost, len(explored)
+
+def reduction(nodes, reference):
+    return f"{100 * (1 - nodes / reference):.1f}%"
+
+def main():
+    sizes = [int(s) for s in sys.argv[1:]] or [10, 25, 50, 100]
+    print(f"{'size':>6} {'A*':>9} {'bi A*':>9} {'saved':>7} {'ucs':>9} {'bi ucs':>9} {'saved':>7} {'vs A*':>7}")
+    for m_size in sizes:
+        cost_astar, n_astar = expanded(astar_search, m_size, h1)
+        cost_bi_astar, n_bi_astar = expanded(bidirectional_astar_search, m_size, h1)
+        cost_ucs, n_ucs = expanded(uniform_cost_search, m_size)
+        cost_bi_ucs, n_bi_ucs = expanded(bidirectional_uniform_cost_search, m_size)
+        assert cost_bi_ucs == cost_ucs, "Bidirectional uniform-cost search is not optimal"
+
+        print(f"{m_size:>6} {n_astar:>9} {n_bi_astar:>9} {reduction(n_bi_astar, n_astar):>7} "
+              f"{n_ucs:>9} {n_bi_ucs:>9} {reduction(n_bi_ucs, n_ucs):>7} {reduction(n_bi_ucs, n_astar):>7}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+# Copyright (C) 2024  Jose Ángel Pérez Garrido
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import random
+from src.miningproblem import MiningProblem
+from src.state import State
+
+SEED = 0
+
+def random_map(m_size, seed=SEED):
+    # Square map of random hardness 1..9, always the same for a given size and seed
+    rng = random.Random(seed * 1000003 + m_size)
+    return [[rng.randint(1, 9) for _ in range(m_size)] for _ in range(m_size)]
+
+def random_problem(m_size, h_function=None, seed=SEED, matrix=None):
+    # Problem going from the top left corner to the bottom right one, as FileWriter maps do
+    if matrix is None:
+        matrix = random_map(m_size, seed)
+    return MiningProblem(State(0, 0, 0), matrix, (m_size, m_size), h_function,
+                         State(m_size-1, m_size-1, 8))
@@ -0,0 +1,52 @@
+# Copyright (C) 2024  Jose Ángel Pérez Garrido
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# Compares h3 with h3_prefix. Run from the repository root:
+#   python -m benchmarks.h3_prefix [sizes...]
+
+import sys, time
+from aima.search import Node, astar_search
+from src.heuristic_functions import h3, h3_prefix
+from src.state import State
+from .common import random_problem
+
+def time_all_cells(problem):
+    # Evaluate the heuristic on every cell of the map and return the values and time
+    nodes = [Node(State(x, y, 0)) for x in range(problem.matrix_size[0]) for y in range(problem.matrix_size[1])]
+    start_time = time.perf_counter()
+    values = [problem.h(node) for node in nodes]
+    return values, time.perf_counter() - start_time
+
+def time_astar(problem):
+    start_time = time.perf_counter()
+    is_solved, solution, explored, frontier = astar_search(problem)
+    return solution.path_cost, time.perf_counter() - start_time
+
+def main():
+    sizes = [int(s) for s in sys.argv[1:]] or [10, 25, 50, 100]
+    print(f"{'size':>6} {'h3 cells':>10} {'prefix':>10} {'h3 A*':>10} {'prefix A*':>10}")
+    for m_size in sizes:
+        values, t_cells = time_all_cells(random_problem(m_size, h3))
+        values_prefix, t_cells_prefix = time_all_cells(random_problem(m_size, h3_prefix))
+        assert values == values_prefix, "h3_prefix differs from h3"
+
+        cost, t_astar = time_astar(random_problem(m_size, h3))
+        cost_prefix, t_astar_prefix = time_astar(random_problem(m_size, h3_prefix))
+        assert cost == cost_prefix, "A* cost differs between h3 and h3_prefix"
+
+        print(f"{m_size:>6} {t_cells:>10.4f} {t_cells_prefix:>10.4f} {t_astar:>10.4f} {t_astar_prefix:>10.4f}")
+
+if __name__ == "__main__":
+    main()
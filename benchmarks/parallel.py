@@ -0,0 +1,49 @@
+# Copyright (C) 2024  Jose Ángel Pérez Garrido
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# Compares the time of the hash-distributed A* with different numbers of workers with
+# grid_astar_search on generated maps. Run from the repository root:
+#   python -m benchmarks.parallel [sizes...]
+
+import os, sys, time
+from src.gridsearch import grid_astar_search
+from src.heuristic_functions import h4
+from src.parallelsearch import parallel_astar_search
+from .common import random_problem
+
+def timed(method, m_size, **kwargs):
+    # Cost of the solution and seconds taken by a method
+    problem = random_problem(m_size, h4)
+    start_time = time.perf_counter()
+    is_solved, solution, explored, frontier = method(problem, **kwargs)
+    return solution.path_cost, time.perf_counter() - start_time
+
+def main():
+    sizes = [int(s) for s in sys.argv[1:]] or [100, 200, 400]
+    counts = sorted({1, 2, 4, os.cpu_count() or 1})
+    print(f"{'size':>6} {'grid A*':>9}" + "".join(f" {f'{n} workers':>10}" for n in counts))
+    for m_size in sizes:
+        # Build the landmark tables before timing
+        timed(grid_astar_search, m_size)
+        cost, elapsed = timed(grid_astar_search, m_size)
+        row = f"{m_size:>6} {elapsed:>8.2f}s"
+        for n in counts:
+            cost_parallel, elapsed = timed(parallel_astar_search, m_size, workers=n)
+            assert cost_parallel == cost, "Parallel A* cost differs from A*"
+            row += f" {elapsed:>9.2f}s"
+        print(row)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# Copyright (C) 2024  Jose Ángel Pérez Garrido
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# Compares the explored set throughput of State, a tuple subclass hashed and compared
+# on (x, y, orientation), with the legacy State it replaced, hashed by position only
+# and compared field by field. Run from the repository root:
+#   python -m benchmarks.state_hashing [sizes...]
+
+import sys, time
+from aima.search import astar_search
+from src import actions
+from src.heuristic_functions import h3_prefix
+from src.state import State
+from .common import random_problem
+
+class LegacyState:
+    # Legacy State before it became a tuple subclass: hashed by position only, so the
+    # eight orientations of a cell collide, and compared field by field
+
+    ORIENTATION_TRAD = State.ORIENTATION_TRAD
+
+    def __init__(self, x, y, o):
+        self.position = (x, y)
+        self.orientation = o
+
+    @property
+    def x(self):
+        return self.position[0]
+
+    @property
+    def y(self):
+        return self.position[1]
+
+    @property
+    def movement(self):
+        return self.ORIENTATION_TRAD[self.orientation]
+
+    def __eq__(self, new_value):
+        return self.position[0] == new_value.position[0] and \
+            self.position[1] == new_value.position[1] and \
+            self.orientation == new_value.orientation
+
+    def __lt__(self, new_value):
+        return 0
+
+    def __hash__(self):
+        return hash(self.position)
+
+def explored_set(state_class, m_size):
+    # Add every state of the map to an explored set and look up all its successors
+    states = [state_class(x, y, o) for x in range(m_size) for y in range(m_size) for o in range(8)]
+    successors = [state_class(s.x, s.y, (s.orientation + 1) % 8) for s in states]
+    start_time = time.perf_counter()
+    explored = set()
+    for state in states:
+        explored.add(state)
+    hits = sum(state in explored for state in successors)
+    elapsed_time = time.perf_counter() - start_time
+    assert hits == len(successors)
+    return (len(states) + len(successors)) / elapsed_time
+
+def astar(state_class, m_size):
+    # A* with the states built by the actions and the problem of the given class
+    actions.State = state_class
+    try:
+        problem = random_problem(m_size, h3_prefix)
+        problem.initial = state_class(problem.initial.x, problem.initial.y, problem.initial.orientation)
+        problem.goal = state_class(problem.goal.x, problem.goal.y, problem.goal.orientation)
+        start_time = time.perf_counter()
+        is_solved, solution, explored, frontier = astar_search(problem)
+        elapsed_time = time.perf_counter() - start_time
+    finally:
+        actions.State = State
+    return solution.path_cost, len(explored), len(explored) / elapsed_time
+
+def main():
+    sizes = [int(s) for s in sys.argv[1:]] or [200]
+    print(f"{'size':>6} {'set ops/s':>12} {'legacy':>12} {'gain':>6} {'A* nodes/s':>12} {'legacy':>12} {'gain':>6}")
+    for m_size in sizes:
+        ops = explored_set(State, m_size)
+        ops_legacy = explored_set(LegacyState, m_size)
+
+        cost, n_explored, rate = astar(State, m_size)
+        cost_legacy, n_explored_legacy, rate_legacy = astar(LegacyState, m_size)
+        assert cost == cost_legacy, "A* cost differs between State and LegacyState"
+
+        print(f"{m_size:>6} {ops:>12.0f} {ops_legacy:>12.0f} {ops / ops_legacy:>5.1f}x "
+              f"{rate:>12.0f} {rate_legacy:>12.0f} {rate / rate_legacy:>5.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+# Copyright (C) 2024  Jose Ángel Pérez Garrido
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# Scaling benchmark of every method and heuristic of main.py. Run from the repository root:
+#   python -m benchmarks.suite run --output results.json
+#   python -m benchmarks.suite compare results.json baseline.json
+
+import argparse, json, os, platform, signal, statistics, sys, time, tracemalloc
+from main import METHODS, HEURISTICS, INFORMED_METHODS
+from .common import random_map, random_problem, SEED
+
+DEFAULT_SIZES = [10, 25, 50, 100, 250, 500, 1000]
+
+
+class RunTimeout(Exception):
+    """Raised inside a run that took longer than the timeout."""
+
+
+def on_alarm(signum, frame):
+    raise RunTimeout()
+
+
+def run_with_timeout(timeout, func, *args):
+    # Run func, stopping it after timeout seconds where SIGALRM exists (not on Windows)
+    if not timeout or not hasattr(signal, 'SIGALRM'):
+        return func(*args)
+    previous = signal.signal(signal.SIGALRM, on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return func(*args)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def write_report(args, results):
+    # Replace the output file with the results so far, so an interrupted run keeps them
+    report = {
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+    with open(args.output + '.tmp', 'w') as fp:
+        json.dump(report, fp, indent=2)
+    os.replace(args.output + '.tmp', args.output)
+
+
+def combinations(methods, heuristics):
+    # Every method with each heuristic if it is informed, or alone if it is not
+    for method in methods:
+        if method in INFORMED_METHODS:
+            for heuristic in heuristics:
+                yield method, heuristic
+        else:
+            yield method, None
+
+
+def run_once(method, heuristic, m_size, matrix, trace_memory=False):
+    problem = random_problem(m_size, HEURISTICS[heuristic] if heuristic else None, matrix=matrix)
+    if trace_memory:
+        tracemalloc.start()
+    start_time = time.perf_counter()
+    is_solved, solution, explored, frontier = METHODS[method](problem)
+    elapsed_time = time.perf_counter() - start_time
+
+    result = {
+        'solved': bool(is_solved),
+        'cost': solution.path_cost,
+        'depth': solution.depth,
+        'explored': len(explored),
+        'frontier': len(frontier),
+    }
+    if trace_memory:
+        result['peak_memory'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, elapsed_time
+
+
+def run(args):
+    methods = args.methods or list(METHODS.keys())
+    heuristics = args.heuristics or list(HEURISTICS.keys())
+    sizes = sorted(args.sizes or DEFAULT_SIZES)
+    maps = {}
+    results = []
+
+    for method, heuristic in combinations(methods, heuristics):
+        for m_size in sizes:
+            name = f"{method}/{heuristic or '-'}/{m_size}"
+            if m_size not in maps:
+                maps[m_size] = random_map(m_size, args.seed)
+
+            times = []
+            try:
+                for _ in range(args.repeat):
+                    result, elapsed_time = run_with_timeout(args.timeout, run_once, method, heuristic,
+                                                            m_size, maps[m_size])
+                    times.append(elapsed_time)
+
+                # Memory is measured in its own run as tracing slows the search down
+                if not args.no_memory:
+                    memory_result, _ = run_with_timeout(args.timeout, run_once, method, heuristic,
+                                                        m_size, maps[m_size], True)
+                    result['peak_memory'] = memory_result['peak_memory']
+            except RunTimeout:
+                if tracemalloc.is_tracing():
+                    tracemalloc.stop()
+                results.append({'method': method, 'heuristic': heuristic, 'size': m_size, 'timeout': args.timeout})
+                write_report(args, results)
+                print(f"{name:<30} over the {args.timeout}s timeout, skipping larger maps", flush=True)
+                break
+
+            result.update({'method': method, 'heuristic': heuristic, 'size': m_size,
+                           'median': statistics.median(times), 'times': times})
+            results.append(result)
+            write_report(args, results)
+            print(f"{name:<30} median {result['median']:.4f}s explored {result['explored']} "
+                  f"frontier {result['frontier']} cost {result['cost']}", flush=True)
+
+            # Larger maps would take even longer
+            if result['median'] > args.budget:
+                print(f"{name:<30} over {args.budget}s, skipping larger maps", flush=True)
+                break
+
+    write_report(args, results)
+    print(f'Benchmark results written to "{args.output}".')
+
+
+def compare(args):
+    with open(args.current) as fp:
+        current = json.load(fp)
+    with open(args.baseline) as fp:
+        baseline = json.load(fp)
+
+    key = lambda r: (r['method'], r['heuristic'], r['size'])
+    baseline_results = {key(r): r for r in baseline['results']}
+
+    regressions = 0
+    for result in current['results']:
+        base = baseline_results.get(key(result))
+        if base is None:
+            continue
+
+        name = f"{result['method']}/{result['heuristic'] or '-'}/{result['size']}"
+        if 'timeout' in result or 'timeout' in base:
+            if 'timeout' in result and 'timeout' not in base:
+                print(f"{name:<30} REGRESSION over the {result['timeout']}s timeout")
+                regressions += 1
+            continue
+        ratio = result['median'] / base['median'] if base['median'] else 1.0
+        problems = []
+        if ratio > 1 + args.tolerance:
+            problems.append(f"time x{ratio:.2f}")
+        if result['explored'] > base['explored']:
+            problems.append(f"explored {base['explored']} -> {result['explored']}")
+        if result['cost'] != base['cost']:
+            problems.append(f"cost {base['cost']} -> {result['cost']}")
+        if 'peak_memory' in result and 'peak_memory' in base and \
+                result['peak_memory'] > base['peak_memory'] * (1 + args.tolerance):
+            problems.append(f"memory {base['peak_memory']} -> {result['peak_memory']}")
+
+        status = "REGRESSION " + ", ".join(problems) if problems else "ok"
+        print(f"{name:<30} x{ratio:.2f} {status}")
+        regressions += bool(problems)
+
+    print(f"{regressions} regression(s) found.")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='DrillRobot scaling benchmark')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='Run the benchmark and write the results to JSON')
+    run_parser.add_argument('--output', default='benchmark.json', help='JSON file for the results')
+    run_parser.add_argument('--sizes', type=int, nargs='+', help='Map sizes (default: 10 to 1000)')
+    run_parser.add_argument('--methods', nargs='+', choices=METHODS.keys(), help='Methods to run (default: all)')
+    run_parser.add_argument('--heuristics', nargs='+', choices=HEURISTICS.keys(), help='Heuristics to run (default: all)')
+    run_parser.add_argument('--repeat', type=int, default=5, help='Timed runs of each entry')
+    run_parser.add_argument('--seed', type=int, default=SEED, help='Seed of the generated maps')
+    run_parser.add_argument('--budget', type=float, default=30.0, help='Median seconds after which larger maps are skipped')
+    run_parser.add_argument('--timeout', type=float, default=60.0, help='Seconds after which a run is stopped and larger maps are skipped (0 for none)')
+    run_parser.add_argument('--no-memory', action='store_true', help='Do not measure peak memory')
+
+    compare_parser = commands.add_parser('compare', help='Flag regressions against a baseline')
+    compare_parser.add_argument('current', help='JSON results to check')
+    compare_parser.add_argument('baseline', help='JSON results used as reference')
+    compare_parser.add_argument('--tolerance', type=float, default=0.10, help='Allowed relative slowdown')
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        run(args)
+    else:
+        sys.exit(compare(args))
+
+if __name__ == "__main__":
+    main()
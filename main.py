@@ -13,14 +13,27 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-import sys, argparse, csv
+import sys, os, argparse, csv
+from functools import partial
 from src.shared import make_dirs
 from pathlib import Path
 from aima.search import breadth_first_graph_search, breadth_first_graph_search_full, depth_first_graph_search, depth_first_graph_search_full, astar_search
-from src.heuristic_functions import h1, h2, h3
+from src.heuristic_functions import h1, h2, h3, h3_prefix, h_perfect, h4
 from src.drillrobot import DrillRobot
-from src.filewriter import FileWriter
+from src.filewriter import FileWriter, DISTRIBUTIONS
 from src.evaluator import Evaluator
+from src.gridsearch import grid_astar_search
+from src.bucketsearch import bucket_astar_search, uniform_cost_search
+from src.hierarchical import hierarchical_search
+from src.memorybounded import ida_star_search, sma_star_search
+from src.anytime import anytime_search
+from src.bidirectional import bidirectional_astar_search, bidirectional_uniform_cost_search
+from src.parallelsearch import parallel_astar_search
+from src.solutioncache import SolutionCache, CACHE_FILE_NAME, CACHE_SIZE
+from src.realtime import lrta_star_search
+from src.tracing import Tracer, LEVELS
+from src.profiling import Profiler, format_phases
+from src.pathservice import PathService
 
 RESULTS_FOLDER_NAME = 'maps'
 
@@ -28,23 +41,52 @@ RESULTS_FOLDER_NAME = 'maps'
 METHODS = {
     'breadth': breadth_first_graph_search_full,
     'depth': depth_first_graph_search_full,
-    'astar': astar_search
+    'astar': astar_search,
+    'grid': grid_astar_search,
+    'bucket': bucket_astar_search,
+    'ucs': uniform_cost_search,
+    'hpa': hierarchical_search,
+    'ida': ida_star_search,
+    'sma': sma_star_search,
+    'ara': anytime_search,
+    'biastar': bidirectional_astar_search,
+    'biucs': bidirectional_uniform_cost_search,
+    'hdastar': parallel_astar_search,
+    'lrta': lrta_star_search
 }
 
+# Methods that need a heuristic function
+INFORMED_METHODS = ('astar', 'grid', 'bucket', 'ida', 'sma', 'ara', 'biastar', 'hdastar', 'lrta')
+
+# Methods that accept a maximum number of nodes in memory
+MEMORY_BOUNDED_METHODS = ('ida', 'sma')
+
+# Methods that return the best solution found before a deadline
+ANYTIME_METHODS = ('ara',)
+
+# Methods that split the search among worker processes
+PARALLEL_METHODS = ('hdastar',)
+
+# Methods that bound the expansions made before each move of the robot
+REALTIME_METHODS = ('lrta',)
+
 HEURISTICS = {
     'h1': h1,
     'h2': h2,
-    'h3': h3
+    'h3': h3,
+    'h3_prefix': h3_prefix,
+    'perfect': h_perfect,
+    'h4': h4
 }
 
 def validate_inputs(args):
     if args.method not in METHODS:
         print("Not enough commands or badly written.")
         sys.exit(1)
-    if args.method in ('breadth', 'depth') and args.heuristic:
-        print("Depth and Breadth search does not need a heuristic function.")
+    if args.method not in INFORMED_METHODS and args.heuristic:
+        print("Uninformed searches do not need a heuristic function.")
         sys.exit(1)
-    if args.method == 'astar':
+    if args.method in INFORMED_METHODS:
         if not args.heuristic:
             print("Astar searches need a heuristic to work.")
             sys.exit(1)
@@ -52,25 +94,55 @@ def validate_inputs(args):
             print("Heuristic does not exist.")
             sys.exit(1)
 
-def execute_method(agent, method_input, heuristic_input):
-    if method_input == "astar":
-        heuristic_func = HEURISTICS[heuristic_input]
-        return agent.solve(METHODS[method_input], heuristic_func)
+def target_cell(value):
+    # Parse a row,col target of --targets
+    try:
+        row, col = map(int, value.split(','))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid target cell: {value}")
+    return row, col
+
+def execute_method(agent, method_input, heuristic_input, tracer=None, memory_cap=None, deadline=None, profiler=None,
+                   workers=None, targets=None, processes=None, lookahead=None, trials=None, macro_actions=False):
+    method = METHODS[method_input]
+    if method_input in MEMORY_BOUNDED_METHODS and memory_cap:
+        method = partial(method, max_nodes=memory_cap)
+    if method_input in ANYTIME_METHODS and deadline:
+        method = partial(method, deadline=deadline)
+    if method_input in PARALLEL_METHODS and workers:
+        method = partial(method, workers=workers)
+    if method_input in REALTIME_METHODS and (lookahead or trials):
+        method = partial(method, **{name: value for name, value in (('lookahead', lookahead), ('trials', trials)) if value})
+
+    heuristic_func = HEURISTICS[heuristic_input] if method_input in INFORMED_METHODS else None
+    if targets:
+        return agent.plan_tour(targets, method, heuristic_func, tracer, processes, profiler, macro_actions)
+
+    if method_input in INFORMED_METHODS:
+        return agent.solve(method, heuristic_func, tracer, stats_only=True, profiler=profiler, macro_actions=macro_actions)
     else:
-        return agent.solve(METHODS[method_input])
+        return agent.solve(method, tracer=tracer, stats_only=True, profiler=profiler, macro_actions=macro_actions)
 
-def generate_performance_report():
+def generate_performance_report(processes=None, sizes=(3, 5, 7, 9), n_maps=10, seed=None, distribution='uniform',
+                                max_nodes=None, max_time=None, resume=False):
     input_str = f"{Path.cwd()}/{RESULTS_FOLDER_NAME}"
     make_dirs(input_str)
 
-    print("Search algorithms and heuristics functions: {} {} {} {} {} {}".format(
-        *METHODS.keys(), *HEURISTICS.keys()))
+    print("Search algorithms and heuristics functions:", *METHODS.keys(), *HEURISTICS.keys())
+
+    # Generate random maps of each size (3x3, 5x5, 7x7 and 9x9 by default)
+    for m_size in sizes:
+        # The result of each job is kept in a file, so an interrupted report can be resumed
+        jobs_file = f'{input_str}/jobs{m_size}.csv'
+        writer = FileWriter(input_str, m_size, seed, distribution)
+        if not resume or not all(os.path.exists(writer.filename(i)) for i in range(1, n_maps + 1)):
+            writer.create_files(n_maps, processes)
+            if os.path.exists(jobs_file):
+                os.remove(jobs_file)
 
-    # Generate random maps of size 3x3, 5x5, 7x7 and 9x9
-    for m_size in [3, 5, 7, 9]:
-        FileWriter(input_str, m_size).create_files()
-        ev = Evaluator(DrillRobot, list(METHODS.values()), list(HEURISTICS.values()))
-        table_performance = ev.evaluate(input_str, m_size)
+        ev = Evaluator(DrillRobot, list(METHODS.values()), list(HEURISTICS.values()),
+                       [METHODS[m] for m in INFORMED_METHODS], processes, n_maps, max_nodes, max_time)
+        table_performance = ev.evaluate(input_str, m_size, jobs_file)
 
         print(f"Table for map size: {m_size}x{m_size}")
         print(table_performance, "\n")
@@ -81,6 +153,17 @@ def generate_performance_report():
             writer.writerows(table_performance)
         print(f'CSV file "{csv_file}" has been created.')
 
+def serve(args):
+    # Answer JSON queries on the input map until the input ends or the server is stopped
+    service = PathService(args.input_map, METHODS, HEURISTICS, INFORMED_METHODS, args.processes, args.cache_size)
+    try:
+        if args.socket:
+            service.serve_socket(args.socket)
+        else:
+            service.serve_stream(sys.stdin, sys.stdout)
+    finally:
+        service.close()
+
 def main():
     # Parse args
     parser = argparse.ArgumentParser(description='DrillRobot Search Algorithm')
@@ -88,21 +171,94 @@ def main():
     parser.add_argument('--method', required=False, default="breadth", choices=METHODS.keys(), help='Search method to use')
     parser.add_argument('--heuristic', choices=HEURISTICS.keys(), help='Heuristic function for A* search')
     parser.add_argument('--report', required=False, type=bool, default=False, help='Generate random maps and create an evaluation report of the different search algorithms')
+    parser.add_argument('--sizes', required=False, type=int, nargs='+', default=[3, 5, 7, 9], help='Sizes of the maps generated by the report')
+    parser.add_argument('--maps', required=False, type=int, default=10, help='Maps of each size generated by the report')
+    parser.add_argument('--seed', required=False, type=int, default=None, help='Seed of the maps generated by the report (default: random)')
+    parser.add_argument('--distribution', required=False, default='uniform', choices=DISTRIBUTIONS, help='Hardness distribution of the maps generated by the report')
+    parser.add_argument('--max_nodes', required=False, type=int, help='Maximum number of nodes expanded by each search of the report')
+    parser.add_argument('--max_time', required=False, type=float, help='Maximum seconds spent by each search of the report')
+    parser.add_argument('--resume', action='store_true', help='Keep the maps and job results of a previous report and run only the missing jobs')
+    parser.add_argument('--memory_cap', required=False, type=int, help='Maximum number of nodes kept in memory by ida and sma')
+    parser.add_argument('--deadline', required=False, type=float, help='Seconds ara may search before returning its best solution')
+    parser.add_argument('--workers', required=False, type=int, help='Number of worker processes used by hdastar (default: all cores)')
+    parser.add_argument('--lookahead', required=False, type=int, help='Nodes lrta may expand before each move of the robot')
+    parser.add_argument('--trials', required=False, type=int, help='Runs of lrta from the start, sharing what was learned')
+    parser.add_argument('--macro_actions', action='store_true', help='Search with "turn to an orientation and move forward" actions (the solution is shown with the basic actions)')
+    parser.add_argument('--targets', required=False, type=target_cell, nargs='+', help='Plan a tour through these cells, given as row,col, instead of going to the goal of the map')
+    parser.add_argument('--solution_cache', required=False, nargs='?', const=CACHE_FILE_NAME, help=f'Reuse the solutions of previous runs kept in this SQLite file (default: {CACHE_FILE_NAME})')
+    parser.add_argument('--solution_cache_size', required=False, type=int, default=CACHE_SIZE, help='Maximum number of solutions kept by --solution_cache')
+    parser.add_argument('--trace', required=False, default='off', choices=LEVELS.keys(), help='Trace level of the search')
+    parser.add_argument('--counters', action='store_true', help='Count expansions, generated and blocked actions during the search')
+    parser.add_argument('--profile', action='store_true', help='Measure the time spent in each phase of the search')
+    parser.add_argument('--profile_memory', action='store_true', help='Also trace the peak memory of the profiled search (slows it down)')
+    parser.add_argument('--profile_output', required=False, help='Also run the search under cProfile and save its statistics to this .prof file')
+    parser.add_argument('--processes', required=False, type=int, default=None, help='Number of worker processes used by the report and --serve (default: all cores)')
+
+    parser.add_argument('--serve', action='store_true', help='Answer newline-delimited JSON queries on the input map')
+    parser.add_argument('--socket', required=False, help='Unix socket used by --serve instead of stdin/stdout')
+    parser.add_argument('--cache_size', required=False, type=int, default=1024, help='Answers kept in memory by --serve')
 
     args = parser.parse_args()
-    
+
+    if args.serve:
+        serve(args)
+        return
+
     validate_inputs(args)
 
     # Create agent
     agent = DrillRobot(args.input_map)
 
     if args.report:
-        generate_performance_report()
+        generate_performance_report(args.processes, args.sizes, args.maps, args.seed, args.distribution,
+                                    args.max_nodes, args.max_time, args.resume)
     else:
-        is_solved, solution, explored, frontier = execute_method(agent, args.method, args.heuristic)
+        tracer = None
+        if args.trace != 'off' or args.counters:
+            tracer = Tracer(LEVELS[args.trace], args.counters)
+
+        profiler = None
+        if args.profile or args.profile_output or args.profile_memory:
+            profiler = Profiler(args.profile_memory, args.profile_output)
+
+        # Runs that are measured or depend on time are not cached
+        cache = None
+        if args.solution_cache and tracer is None and profiler is None and not args.targets and not args.deadline:
+            cache = SolutionCache(args.solution_cache, args.solution_cache_size)
+        options = {name: value for name, value in (('memory_cap', args.memory_cap), ('workers', args.workers),
+                                                     ('lookahead', args.lookahead), ('trials', args.trials),
+                                                     ('macro_actions', args.macro_actions)) if value}
+
+        result = cache.get(agent, args.method, args.heuristic, options) if cache else None
+        if result is None:
+            result = execute_method(agent, args.method, args.heuristic, tracer, args.memory_cap, args.deadline, profiler,
+                                    args.workers, args.targets, args.processes, args.lookahead, args.trials,
+                                    args.macro_actions)
+            if cache:
+                cache.put(agent, args.method, args.heuristic, options, result)
+        if cache:
+            cache.close()
+        is_solved, solution, explored, frontier = result
 
         print("Total number of items in explored list:", len(explored))
         print("Total number of items in frontier:", len(frontier))
+        if 'peak_nodes' in result.stats:
+            print("Peak number of nodes in memory:", result.stats['peak_nodes'])
+        for found in result.stats.get('solutions', []):
+            print(f"Solution of cost {found['cost']} with weight {found['weight']:g} "
+                  f"(bound {found['bound']:.3f}) after {found['time']:.3f}s")
+        if 'bound' in result.stats:
+            print(f"Suboptimality bound: {result.stats['bound']:.3f}")
+        if 'order' in result.stats:
+            print("Tour order:", ", ".join(f"({x}, {y})" for x, y in result.stats['order']))
+            print("Leg costs:", result.stats['leg_costs'])
+            print("Estimated cost:", result.stats['estimated_cost'],
+                  "(nearest neighbour:", f"{result.stats['nearest_neighbour_cost']})")
+        if 'trial_costs' in result.stats:
+            stats = result.stats
+            print("Trial costs:", stats['trial_costs'], "(optimal:", f"{stats['optimal_cost']})")
+            print("Decision steps:", stats['steps'], "- latency", ", ".join(
+                f"{name} {value * 1000:.3f}ms" for name, value in stats['latency'].items()))
         print("Cost:", solution.path_cost)
         print("Depth:", solution.depth)
         print("Solution found!" if is_solved else "Solution not found")
@@ -110,5 +266,25 @@ def main():
         path = ", ".join(step.name for step in solution.solution())
         print("Solution Path:", path)
 
+        if args.counters:
+            stats = result.stats
+            print("Nodes expanded:", stats['expansions'])
+            print("Actions generated:", stats['actions'])
+            print("Blocked moves:", stats['blocked'])
+            print(f"Nodes per second: {stats['nodes_per_second']:.0f}")
+
+        if profiler is not None:
+            stats = result.stats
+            print(*format_phases(stats), sep="\n")
+            print(f"Search time: {stats['search_time']:.4f}s")
+            if stats['expansions_per_second'] is None:
+                print("Expansions per second: n/a")
+            else:
+                print(f"Expansions per second: {stats['expansions_per_second']:.0f}")
+            if stats['peak_memory'] is not None:
+                print(f"Peak traced memory: {stats['peak_memory'] / 1024:.1f} KiB")
+            if args.profile_output:
+                print(f'cProfile statistics saved to "{args.profile_output}".')
+
 if __name__ == "__main__":
     main()
@@ -40,8 +40,9 @@ class MoveForwardAction(Action):
         
     def execute(self,state):
         # Calculate the new position based on the current position and orientation
-        x=state.position[0]+state.movement[0]
-        y=state.position[1]+state.movement[1]
+        movement = state.movement
+        x=state.x+movement[0]
+        y=state.y+movement[1]
         # New state after moving a position forward
         return State(x, y, state.orientation)
         
@@ -69,4 +70,23 @@ class CounterClockwiseAction(Action):
         # Uses the modulus to limit orientation to the range (0, 1, 2, ... 7)
         orient = (state.orientation - 1) % 8
         # New state after rotating 45 degrees counterclockwise
-        return State(state.x, state.y, orient)
\ No newline at end of file
+        return State(state.x, state.y, orient)
+
+
+class TurnAndMoveAction(Action):
+    # Macro-action: rotate to a given orientation by the shortest way, then move forward
+    def __init__(self, orientation):
+        super().__init__(f"{self.__class__.__name__}{orientation}")
+        self.orientation = orientation
+
+    def turns(self, state):
+        # Number of 45 degree rotations and whether they are clockwise
+        clockwise = (self.orientation - state.orientation) % 8
+        if clockwise <= 4:
+            return clockwise, True
+        return 8 - clockwise, False
+
+    def execute(self,state):
+        # New state after turning and moving a position forward
+        movement = state.get_orientation(self.orientation)
+        return State(state.x + movement[0], state.y + movement[1], self.orientation)
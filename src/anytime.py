@@ -0,0 +1,167 @@
+# Copyright (C) 2024  Jose Ángel Pérez Garrido
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import heapq
+import math
+import time
+from array import array
+from aima.search import Node
+from .gridsearch import grid_graph, state_heuristic, build_solution, trace_expansion, ORIENTATIONS
+from .shared import SolveResult
+
+# Weight of the heuristic in the first search and decrease after each solution
+INITIAL_WEIGHT = 2.5
+WEIGHT_STEP = 0.5
+
+# Number of expansions between two checks of the deadline
+DEADLINE_CHECK = 256
+
+INF = math.inf
+
+
+class DeadlineReached(Exception):
+    pass
+
+
+def anytime_search(problem, deadline=None, weight=INITIAL_WEIGHT, step=WEIGHT_STEP, on_solution=None):
+    """Anytime repairing A* (ARA*) over the integer encoding of the state space. A first path
+    is found quickly with f = g + weight * h; then the weight is decreased by step and the
+    search goes on from the states whose cost improved, reusing the costs already found.
+    It stops when the solution is proven optimal or deadline seconds have passed, returning
+    the best solution found. The deadline counts from the end of the build of the state
+    graph, which is cached per map and not part of the search.
+
+    Every solution is recorded in stats['solutions'] with its cost, the weight used, its
+    suboptimality bound (the cost is at most bound times the optimal one if h is admissible)
+    and the time it was found, and the bound of the returned solution is in stats['bound'].
+    on_solution(solution, bound), if given, is called with each new solution.
+    Returns the same (is_solved, solution, explored, frontier) tuple as astar_search."""
+    graph = grid_graph(problem)
+    h = state_heuristic(problem, graph)
+    started = time.perf_counter()
+    goal_cell = graph.cell(problem.goal.x, problem.goal.y)
+    start = graph.index(problem.initial.x, problem.initial.y, problem.initial.orientation)
+
+    g = array('l', [-1]) * graph.n_states
+    parent = array('l', [-1]) * graph.n_states
+    parent_action = array('b', [-1]) * graph.n_states
+    in_open = bytearray(graph.n_states)
+    closed = bytearray(graph.n_states)
+    # Closed states whose cost improved, expanded again with the next weight
+    incons = set()
+    explored = []
+    solutions = []
+    goal, goal_cost = -1, INF
+
+    g[start] = 0
+    open_list = [(weight * h(start), 0, start)]
+    in_open[start] = 1
+    counter = 1
+
+    def improve_path(w):
+        # Expand states until no open state can lead to a path cheaper than the goal one
+        nonlocal goal, goal_cost, counter
+        while open_list:
+            key, _, idx = open_list[0]
+            if not in_open[idx] or key != g[idx] + w * h(idx):
+                # Outdated entry of a state whose cost decreased
+                heapq.heappop(open_list)
+                continue
+            if key >= goal_cost:
+                return
+            heapq.heappop(open_list)
+            in_open[idx] = 0
+            closed[idx] = 1
+            explored.append(idx)
+
+            if deadline is not None and len(explored) % DEADLINE_CHECK == 0 and \
+                    time.perf_counter() - started > deadline:
+                raise DeadlineReached()
+
+            successors = graph.successors(idx)
+            if problem.tracer is not None:
+                trace_expansion(problem, graph, idx, successors)
+
+            for action, succ, cost in successors:
+                new_cost = g[idx] + cost
+                if 0 <= g[succ] <= new_cost:
+                    continue
+                g[succ] = new_cost
+                parent[succ] = idx
+                parent_action[succ] = action
+                if succ // ORIENTATIONS == goal_cell:
+                    if new_cost < goal_cost:
+                        goal, goal_cost = succ, new_cost
+                elif closed[succ]:
+                    incons.add(succ)
+                else:
+                    in_open[succ] = 1
+                    heapq.heappush(open_list, (new_cost + w * h(succ), counter, succ))
+                    counter += 1
+
+    def pending_states():
+        # States that may still lead to a cheaper path
+        return [idx for _, _, idx in open_list if in_open[idx]] + list(incons)
+
+    def bound(w):
+        # Suboptimality bound of the current solution
+        lowest = min((g[idx] + h(idx) for idx in set(pending_states())), default=INF)
+        if lowest >= goal_cost:
+            return 1.0
+        return min(w, goal_cost / lowest) if lowest > 0 else w
+
+    def publish(w):
+        solution = build_solution(problem, graph, parent, parent_action, g, goal)
+        solutions.append({'cost': solution.path_cost, 'weight': w, 'bound': bound(w),
+                          'time': time.perf_counter() - started})
+        if on_solution is not None:
+            on_solution(solution, solutions[-1]['bound'])
+        return solution
+
+    w = max(1.0, weight)
+    solution, current_bound = None, INF
+    if start // ORIENTATIONS == goal_cell:
+        goal, goal_cost = start, 0
+    try:
+        while True:
+            improve_path(w)
+            if goal < 0:
+                break
+            if solution is None or goal_cost < solution.path_cost:
+                solution = publish(w)
+            current_bound = bound(w)
+            if current_bound <= 1.0 or (deadline is not None and time.perf_counter() - started > deadline):
+                break
+
+            # Search again with a lower weight, from the open and inconsistent states
+            w = max(1.0, w - step)
+            states = set(pending_states())
+            incons.clear()
+            closed[:] = bytes(graph.n_states)
+            open_list = [(g[idx] + w * h(idx), i, idx) for i, idx in enumerate(states)]
+            heapq.heapify(open_list)
+            for idx in states:
+                in_open[idx] = 1
+    except DeadlineReached:
+        # A cheaper goal may have been reached in the interrupted search
+        if goal >= 0 and (solution is None or goal_cost < solution.path_cost):
+            solution = publish(w)
+            current_bound = solutions[-1]['bound']
+
+    frontier = set(pending_states())
+    stats = {'solutions': solutions, 'bound': current_bound}
+    if solution is None:
+        return SolveResult((False, Node(problem.initial), explored, frontier), stats)
+    return SolveResult((True, solution, explored, frontier), stats)
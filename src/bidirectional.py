@@ -0,0 +1,154 @@
+# Copyright (C) 2024  Jose Ángel Pérez Garrido
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import heapq
+import math
+from array import array
+from aima.search import Node
+from .gridsearch import grid_graph, state_heuristic, build_solution, trace_expansion, ORIENTATIONS
+
+INF = math.inf
+
+
+class SearchSide:
+    """One direction of a bidirectional search: costs, parents and open states of the states
+    reached from its roots. The open states are kept in three heaps, ordered by the priority
+    max(f, 2g) of MM, by f = g + h and by g, whose outdated entries are skipped when they
+    reach the top."""
+
+    def __init__(self, graph, h, roots):
+        self.h = h
+        self.g = array('l', [-1]) * graph.n_states
+        # Next state towards the root and action joining both
+        self.parent = array('l', [-1]) * graph.n_states
+        self.parent_action = array('b', [-1]) * graph.n_states
+        self.closed = bytearray(graph.n_states)
+        self.by_priority, self.by_f, self.by_g = [], [], []
+        self.size = 0
+        for idx in roots:
+            self.push(idx, 0)
+
+    def push(self, idx, g):
+        if self.g[idx] < 0:
+            self.size += 1
+        self.g[idx] = g
+        f = g + self.h(idx)
+        heapq.heappush(self.by_priority, (max(f, 2 * g), g, idx))
+        heapq.heappush(self.by_f, (f, g, idx))
+        heapq.heappush(self.by_g, (g, idx))
+
+    def top(self, heap):
+        # Lowest entry of a heap still matching an open state
+        while heap:
+            entry = heap[0]
+            idx = entry[-1]
+            if not self.closed[idx] and self.g[idx] == entry[-2]:
+                return entry[0]
+            heapq.heappop(heap)
+        return INF
+
+    def pop(self):
+        # Remove and return the open state with the lowest priority
+        self.top(self.by_priority)
+        _, _, idx = heapq.heappop(self.by_priority)
+        self.closed[idx] = 1
+        self.size -= 1
+        return idx
+
+    def open_states(self):
+        return {idx for _, _, idx in self.by_f if not self.closed[idx] and self.g[idx] >= 0}
+
+
+def bidirectional_best_first_search(problem, h_forward, h_backward):
+    """Searches from the initial state and, over the reversed actions, from the 8 orientations
+    of the goal cell at the same time (the MM algorithm). The open state with the lowest
+    priority max(f, 2g) of either side is expanded, so no side goes further than half the cost
+    of the path. It stops when no path through the open states can be cheaper than the best
+    one joining both sides: when that cost is at most the lowest priority, the lowest f of
+    either side or the sum of the lowest g of both.
+    The path is optimal if both heuristics are admissible and consistent.
+    Returns the same (is_solved, solution, explored, frontier) tuple as astar_search."""
+    graph = grid_graph(problem)
+    start = graph.index(problem.initial.x, problem.initial.y, problem.initial.orientation)
+    goal = graph.index(problem.goal.x, problem.goal.y, 0)
+    forward = SearchSide(graph, h_forward, [start])
+    backward = SearchSide(graph, h_backward, range(goal, goal + ORIENTATIONS))
+    explored = []
+
+    # Cost of the best path found and state where both sides meet
+    best, meeting = INF, -1
+    if goal <= start < goal + ORIENTATIONS:
+        best, meeting = 0, start
+
+    while forward.size and backward.size:
+        lowest_priority = min(forward.top(forward.by_priority), backward.top(backward.by_priority))
+        if best <= max(lowest_priority, forward.top(forward.by_f), backward.top(backward.by_f),
+                       forward.top(forward.by_g) + backward.top(backward.by_g)):
+            break
+
+        if forward.top(forward.by_priority) <= backward.top(backward.by_priority):
+            side, other = forward, backward
+            idx = side.pop()
+            neighbours = graph.successors(idx)
+            if problem.tracer is not None:
+                trace_expansion(problem, graph, idx, neighbours)
+        else:
+            side, other = backward, forward
+            idx = side.pop()
+            neighbours = graph.predecessors(idx)
+            if problem.tracer is not None:
+                problem.tracer.expanded(graph.state(idx))
+        explored.append(idx)
+
+        g = side.g[idx]
+        for action, neighbour, step in neighbours:
+            new_cost = g + step
+            if side.closed[neighbour] or 0 <= side.g[neighbour] <= new_cost:
+                continue
+            side.parent[neighbour] = idx
+            side.parent_action[neighbour] = action
+            side.push(neighbour, new_cost)
+            if other.g[neighbour] >= 0 and new_cost + other.g[neighbour] < best:
+                best, meeting = new_cost + other.g[neighbour], neighbour
+
+    frontier = forward.open_states() | backward.open_states()
+    if meeting < 0:
+        return False, Node(problem.initial), explored, frontier
+
+    # Forward half of the path, then follow the backward parents to the goal
+    node = build_solution(problem, graph, forward.parent, forward.parent_action, forward.g, meeting)
+    idx = meeting
+    while backward.parent[idx] >= 0:
+        action, next_idx = backward.parent_action[idx], backward.parent[idx]
+        step = backward.g[idx] - backward.g[next_idx]
+        node = Node(graph.state(next_idx), node, problem.actions_list[action], node.path_cost + step)
+        idx = next_idx
+    return True, node, explored, frontier
+
+
+def bidirectional_astar_search(problem):
+    """Bidirectional A* search. The backward side estimates the cost from the initial state
+    to a state as h(initial) - h(state), a lower bound if the heuristic is consistent."""
+    graph = grid_graph(problem)
+    h = state_heuristic(problem, graph)
+    start = graph.index(problem.initial.x, problem.initial.y, problem.initial.orientation)
+    h_start = h(start)
+    return bidirectional_best_first_search(problem, h, lambda idx: max(0, h_start - h(idx)))
+
+
+def bidirectional_uniform_cost_search(problem):
+    """Bidirectional uniform-cost search (Dijkstra from both ends)."""
+    no_estimate = lambda idx: 0
+    return bidirectional_best_first_search(problem, no_estimate, no_estimate)
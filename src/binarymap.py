@@ -0,0 +1,102 @@
+# Copyright (C) 2024  Jose Ángel Pérez Garrido
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# Binary map format: a fixed header followed by the hardness of every cell as uint8, row by row.
+# Convert a text map with:
+#   python -m src.binarymap input.txt output.bin
+
+import mmap
+import struct
+import sys
+from .state import State
+
+MAGIC = b'DRMP'
+VERSION = 1
+
+# magic, version, reserved, rows, cols, initial x, y, orientation, goal x, y, orientation
+HEADER = struct.Struct('<4sHHIIiiiiii')
+
+
+class MappedMatrix:
+    """Read-only matrix over the memory-mapped grid of a binary map. matrix[x] is a
+    zero-copy view of row x and matrix[x][y] a plain int, as in the text maps."""
+
+    def __init__(self, buffer, rows, cols):
+        self.rows = rows
+        self.cols = cols
+        self._mmap = buffer
+        self._view = memoryview(buffer)[HEADER.size:HEADER.size + rows * cols]
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, x):
+        if not 0 <= x < self.rows:
+            raise IndexError("map row out of range")
+        return self._view[x * self.cols:(x + 1) * self.cols]
+
+    def __iter__(self):
+        for x in range(self.rows):
+            yield self[x]
+
+
+def is_binary_map(filename):
+    # Whether the file starts with the magic of the binary format
+    with open(filename, 'rb') as fp:
+        return fp.read(len(MAGIC)) == MAGIC
+
+
+def read_binary_map(filename):
+    """Memory-maps a binary map and returns its size, matrix, initial and goal states."""
+    with open(filename, 'rb') as fp:
+        buffer = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version, _, rows, cols, ix, iy, io, gx, gy, go = HEADER.unpack_from(buffer)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{filename} is not a binary map of version {VERSION}")
+    if len(buffer) < HEADER.size + rows * cols:
+        raise ValueError(f"{filename} is truncated")
+
+    return (rows, cols), MappedMatrix(buffer, rows, cols), State(ix, iy, io), State(gx, gy, go)
+
+
+def write_binary_map(filename, matrix, initial, goal):
+    """Writes a map in the binary format. Hardness values must fit in a byte."""
+    rows, cols = len(matrix), len(matrix[0])
+    with open(filename, 'wb') as fp:
+        fp.write(HEADER.pack(MAGIC, VERSION, 0, rows, cols,
+                             initial.x, initial.y, initial.orientation,
+                             goal.x, goal.y, goal.orientation))
+        for row in matrix:
+            if len(row) != cols:
+                raise ValueError("All the rows of the map must have the same length")
+            try:
+                fp.write(bytes(row))
+            except ValueError:
+                raise ValueError("Hardness values must be between 0 and 255")
+
+
+def convert_map(txt_filename, bin_filename):
+    # Convert a text map into the binary format
+    from .filereader import FileReader
+    reader = FileReader(txt_filename)
+    write_binary_map(bin_filename, reader.matrix, reader.initial_state, reader.goal_state)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python -m src.binarymap input.txt output.bin")
+        sys.exit(1)
+    convert_map(sys.argv[1], sys.argv[2])
@@ -0,0 +1,105 @@
+# Copyright (C) 2024  Jose Ángel Pérez Garrido
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import math
+from collections import deque
+from aima.search import Node
+
+
+class BucketQueue:
+    """Priority queue of nodes for small non-negative integer keys (Dial's algorithm).
+    There is one FIFO bucket per key, so push, pop and decrease-key are O(1) amortized.
+    A node whose key is decreased is pushed again and its old entry is skipped when popped."""
+
+    def __init__(self):
+        self.buckets = []
+        # Current key and node of every state in the queue
+        self.entries = {}
+        # Lowest key that may still have nodes
+        self.cursor = 0
+
+    def push(self, node, key):
+        # Add a node, or move it to a lower key if its state is already queued
+        while key >= len(self.buckets):
+            self.buckets.append(deque())
+        self.buckets[key].append(node)
+        self.entries[node.state] = (key, node)
+        if key < self.cursor:
+            self.cursor = key
+
+    def pop(self):
+        # Remove and return the (key, node) with the lowest key
+        while self.entries:
+            bucket = self.buckets[self.cursor]
+            while bucket:
+                node = bucket.popleft()
+                entry = self.entries.get(node.state)
+                # Skip nodes that were pushed again with a lower key
+                if entry is not None and entry[1] is node:
+                    del self.entries[node.state]
+                    return entry
+            self.cursor += 1
+        raise IndexError("pop from an empty bucket queue")
+
+    def key(self, state):
+        # Key of a queued state, or None if it is not in the queue
+        entry = self.entries.get(state)
+        return entry[0] if entry is not None else None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, state):
+        return state in self.entries
+
+
+def bucket_best_first_search(problem, h):
+    """Best-first graph search ordered by f = g + h with integer keys in a BucketQueue.
+    Returns the same (is_solved, solution, explored, frontier) tuple as astar_search."""
+    node = Node(problem.initial)
+    frontier = BucketQueue()
+    frontier.push(node, math.ceil(h(node)))
+    explored = set()
+
+    while frontier:
+        _, node = frontier.pop()
+        if problem.goal_test(node.state):
+            return True, node, explored, frontier
+        explored.add(node.state)
+
+        for child in node.expand(problem):
+            if child.state in explored:
+                continue
+            estimate = h(child)
+            # The goal cannot be reached from this state
+            if estimate == math.inf:
+                continue
+            # Path costs are integers, so rounding h up keeps it admissible
+            f = math.ceil(child.path_cost + estimate)
+            current = frontier.key(child.state)
+            if current is None or f < current:
+                frontier.push(child, f)
+
+    return False, node, explored, frontier
+
+
+def bucket_astar_search(problem):
+    """A* search with a bucket queue frontier, using the heuristic of the problem."""
+    return bucket_best_first_search(problem, lambda node: problem.h(node) or 0)
+
+
+def uniform_cost_search(problem):
+    """Uniform-cost search (Dijkstra) with a bucket queue frontier."""
+    return bucket_best_first_search(problem, lambda node: 0)
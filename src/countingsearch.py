@@ -0,0 +1,99 @@
+# Copyright (C) 2024  Jose Ángel Pérez Garrido
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from collections import deque
+from aima.search import Node, breadth_first_graph_search_full, depth_first_graph_search_full
+from .gridsearch import ORIENTATIONS
+from .shared import SolveResult, ItemCount
+
+# The explored and frontier sets are kept as one flag per (row, col, orientation), so only
+# the nodes in the frontier (and their ancestors) stay in memory during the search.
+
+
+def state_index(problem, state):
+    # Integer index of a state, as in GridGraph
+    return (state.x * problem.matrix_size[1] + state.y) * ORIENTATIONS + state.orientation
+
+
+def counting_result(is_solved, node, n_explored, n_frontier, peak_frontier):
+    return SolveResult((is_solved, node, ItemCount(n_explored), ItemCount(n_frontier)),
+                       {'peak_explored': n_explored, 'peak_frontier': peak_frontier})
+
+
+def breadth_first_counting_search(problem):
+    """Same search as breadth_first_graph_search_full, returning only the number of
+    items of the explored and frontier sets, with the largest frontier in stats."""
+    n_states = problem.matrix_size[0] * problem.matrix_size[1] * ORIENTATIONS
+    node = Node(problem.initial)
+    if problem.goal_test(node.state):
+        return counting_result(True, node, 0, 0, 0)
+
+    explored = bytearray(n_states)
+    queued = bytearray(n_states)
+    frontier = deque([node])
+    queued[state_index(problem, node.state)] = 1
+    n_explored, peak_frontier = 0, 1
+
+    while frontier:
+        node = frontier.popleft()
+        idx = state_index(problem, node.state)
+        queued[idx] = 0
+        explored[idx] = 1
+        n_explored += 1
+        for child in node.expand(problem):
+            child_idx = state_index(problem, child.state)
+            if not explored[child_idx] and not queued[child_idx]:
+                if problem.goal_test(child.state):
+                    return counting_result(True, child, n_explored, len(frontier), peak_frontier)
+                frontier.append(child)
+                queued[child_idx] = 1
+        peak_frontier = max(peak_frontier, len(frontier))
+
+    return counting_result(False, node, n_explored, 0, peak_frontier)
+
+
+def depth_first_counting_search(problem):
+    """Same search as depth_first_graph_search_full, returning only the number of
+    items of the explored and frontier sets, with the largest frontier in stats."""
+    n_states = problem.matrix_size[0] * problem.matrix_size[1] * ORIENTATIONS
+    explored = bytearray(n_states)
+    queued = bytearray(n_states)
+    frontier = [Node(problem.initial)]
+    queued[state_index(problem, problem.initial)] = 1
+    n_explored, peak_frontier = 0, 1
+
+    while frontier:
+        node = frontier.pop()
+        if problem.goal_test(node.state):
+            return counting_result(True, node, n_explored, len(frontier), peak_frontier)
+        idx = state_index(problem, node.state)
+        queued[idx] = 0
+        explored[idx] = 1
+        n_explored += 1
+        for child in node.expand(problem):
+            child_idx = state_index(problem, child.state)
+            if not explored[child_idx] and not queued[child_idx]:
+                frontier.append(child)
+                queued[child_idx] = 1
+        peak_frontier = max(peak_frontier, len(frontier))
+
+    return counting_result(False, node, n_explored, 0, peak_frontier)
+
+
+# Search functions with a counting variant used by DrillRobot.solve(stats_only=True)
+COUNTING_SEARCHES = {
+    breadth_first_graph_search_full: breadth_first_counting_search,
+    depth_first_graph_search_full: depth_first_counting_search,
+}
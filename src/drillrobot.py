@@ -15,6 +15,10 @@
 
 from .miningproblem import MiningProblem
 from .filereader import FileReader
+from .incremental import IncrementalPlanner
+from .shared import SolveResult, ItemCount
+from .countingsearch import COUNTING_SEARCHES
+from .tourplanner import plan_tour
 from aima.search import SimpleProblemSolvingAgentProgram
 
 class DrillRobot(SimpleProblemSolvingAgentProgram):
@@ -26,16 +30,82 @@ class DrillRobot(SimpleProblemSolvingAgentProgram):
         self.matrix_size = reader.matrix_size
         self.map = reader.matrix
         self.goal = reader.goal_state
+        self.map_file = txtfilepath
 
-    def solve(self, search_algorithm, h=None):
+    def solve(self, search_algorithm, h=None, tracer=None, stats_only=False, profiler=None, macro_actions=False):
         """Formulate a problem, then search for a sequence
-        of actions to solve it."""
-        problem = self.formulate_problem(h)
-        self.seq = self.search(problem, search_algorithm)
+        of actions to solve it. The counters of the tracer, if
+        any, are returned in the stats of the result.
+        With stats_only, only the number of items of the explored
+        and frontier sets is returned, and searches with a counting
+        variant do not keep those sets at all.
+        With a src.profiling.Profiler, the time spent in each
+        phase of the search is returned in the stats too.
+        With macro_actions, the problem turns and moves forward
+        in one action, and the solution is expanded back into
+        the basic actions."""
+        if stats_only:
+            search_algorithm = COUNTING_SEARCHES.get(search_algorithm, search_algorithm)
+        problem = self.formulate_problem(h, tracer, macro_actions)
+        if tracer is not None:
+            tracer.start(problem)
+        if profiler is None:
+            result = self.search(problem, search_algorithm)
+        else:
+            with profiler.running():
+                result = self.search(profiler.instrument(problem), search_algorithm)
+        # Keep the statistics the search algorithm may have returned
+        self.seq = result if isinstance(result, SolveResult) else SolveResult(result)
+        if stats_only:
+            is_solved, solution, explored, frontier = self.seq
+            self.seq = SolveResult((is_solved, solution, ItemCount(len(explored)), ItemCount(len(frontier))),
+                                   self.seq.stats)
+        if macro_actions:
+            is_solved, solution, explored, frontier = self.seq
+            self.seq = SolveResult((is_solved, problem.expand_solution(solution), explored, frontier), self.seq.stats)
+        if tracer is not None:
+            tracer.stop()
+            self.seq.stats.update(tracer.stats())
+        if profiler is not None:
+            self.seq.stats.update(profiler.stats())
         return self.seq
 
-    def formulate_problem(self, h):
-        return MiningProblem(self.state, self.map, self.matrix_size, h, self.goal)
+    def plan_tour(self, targets, search_algorithm, h=None, tracer=None, processes=None, profiler=None,
+                  macro_actions=False):
+        """Search for a tour visiting every target cell (row, col),
+        in the order that makes its drilling cost the lowest found.
+        The tracer, profiler and macro_actions work as in solve,
+        over the searches of all the legs (the profiled time also
+        includes the cost matrix of the targets)."""
+        problem = self.formulate_problem(h, tracer, macro_actions)
+        if tracer is not None:
+            tracer.start(problem)
+        if profiler is None:
+            self.seq = plan_tour(problem, targets, search_algorithm, processes)
+        else:
+            with profiler.running():
+                self.seq = plan_tour(problem, targets, search_algorithm, processes, profiler.instrument)
+        if macro_actions:
+            is_solved, solution, explored, frontier = self.seq
+            self.seq = SolveResult((is_solved, problem.expand_solution(solution), explored, frontier), self.seq.stats)
+        if tracer is not None:
+            tracer.stop()
+            self.seq.stats.update(tracer.stats())
+        if profiler is not None:
+            self.seq.stats.update(profiler.stats())
+        return self.seq
+
+    def formulate_problem(self, h, tracer=None, macro_actions=False):
+        return MiningProblem(self.state, self.map, self.matrix_size, h, self.goal, tracer, self.map_file, macro_actions)
 
     def search(self, problem, search_algorithm):
         return search_algorithm(problem)
+
+    def incremental_planner(self):
+        """Planner that repairs its plan when cell hardness changes
+        or the robot moves, instead of solving again from scratch."""
+        problem = self.formulate_problem(None)
+        if not isinstance(problem.map, list):
+            # The planner writes the changes in the map, and binary maps are read-only
+            problem.map = [list(row) for row in problem.map]
+        return IncrementalPlanner(problem)
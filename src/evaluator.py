@@ -1,5 +1,5 @@
 # Copyright (C) 2024  Jose Ángel Pérez Garrido
-# 
+#
 # This program is free software: you can redistribute it and/or modify
 # it under the terms of the GNU General Public License as published by
 # the Free Software Foundation, either version 3 of the License, or
@@ -14,86 +14,221 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 from aima.search import breadth_first_graph_search, depth_first_graph_search, astar_search
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from .heuristic_functions import h1, h2
 from .shared import blockPrint, enablePrint
+from .tracing import BudgetTracer, BudgetExceeded
+import csv
+import os
+import sys
 import time
 
+# Outcome of a job
+SOLVED, NOT_SOLVED, BUDGET_EXCEEDED, ERROR = 'solved', 'not solved', 'budget exceeded', 'error'
+
+# Columns of the file with the result of every job
+JOB_FIELDS = ['map', 'method', 'heuristic', 'status', 'depth', 'cost', 'explored', 'frontier', 'time']
+
+# Agents already loaded by this process, so every map is read only once per worker
+_agents = {}
+
+def run_job(agent, map_file, search_f, heuris_f, max_nodes=None, max_time=None):
+    """Solves one map with one algorithm (and heuristic) and returns its statistics.
+    The search is stopped if it expands more than max_nodes nodes or takes more than
+    max_time seconds. The time is measured inside the process running the job. A job
+    that raises an exception is reported with the error status (and the exception on
+    stderr), so the other jobs keep running."""
+    if map_file not in _agents:
+        _agents[map_file] = agent(map_file)
+
+    tracer = None
+    if max_nodes is not None or max_time is not None:
+        tracer = BudgetTracer(max_nodes, max_time)
+
+    start_time = time.perf_counter()
+    try:
+        # Only the number of explored and frontier items is needed
+        is_solved, solution, explored, frontier = _agents[map_file].solve(search_f, heuris_f, tracer, stats_only=True)
+    except BudgetExceeded:
+        return BUDGET_EXCEEDED, 0, 0, 0, 0, time.perf_counter() - start_time
+    except Exception as e:
+        print(f"{map_file} {name_of(search_f)} {name_of(heuris_f)}: {type(e).__name__}: {e}", file=sys.stderr)
+        return ERROR, 0, 0, 0, 0, time.perf_counter() - start_time
+    elapsed_time = time.perf_counter() - start_time
+
+    status = SOLVED if is_solved else NOT_SOLVED
+    return status, solution.depth, solution.path_cost, len(explored), len(frontier), elapsed_time
+
+
+def name_of(func):
+    # Name of a search or heuristic function in the file of jobs
+    return getattr(func, '__name__', repr(func)) if func is not None else ''
+
+
 class Evaluator:
 
-    def __init__(self, agent, search_funcs, heuris_funcs=[h1,h2]):
+    def __init__(self, agent, search_funcs, heuris_funcs=[h1,h2], informed_funcs=[astar_search], processes=None, n_maps=10,
+                 max_nodes=None, max_time=None):
         self.agent = agent
         self.search_funcs = search_funcs
         self.heuris_funcs = heuris_funcs
+        self.informed_funcs = informed_funcs
+        # Number of worker processes (None uses every core, 1 runs in this process)
+        self.processes = processes
+        # Number of maps of each size
+        self.n_maps = n_maps
+        # Budget of every job (None for no limit)
+        self.max_nodes = max_nodes
+        self.max_time = max_time
+
+        # Algorithm and heuristic of each row of the table
+        self.combinations = []
+        for search_f in search_funcs:
+            # If it is an informed algorithm, the heuristics are taken into account, if not, no
+            if search_f in informed_funcs:
+                self.combinations.extend((search_f, heuris_f) for heuris_f in heuris_funcs)
+            else:
+                self.combinations.append((search_f, None))
 
         # Create a initial table with fields to 0
-        rows = len(search_funcs)+len(heuris_funcs) -1
-        self.table_performance = [[0] * 5] * rows
-
-
-    def evaluate(self, input_folder, m_size):
-        # Prevent prints for being shown in terminal
-        blockPrint()
-
-        start_time = time.time()
-        # Initializate the variables
-        d, g, nE, nF, cont_solv = 0, 0, 0, 0, 0
+        self.table_performance = [[0] * 5 for _ in self.combinations]
+        # Time spent by every job of each row
+        self.job_times = [[] for _ in self.combinations]
+        # Jobs of each row stopped by the budget or by an error
+        self.exceeded = [0] * len(self.combinations)
+        self.failed = [0] * len(self.combinations)
 
-        # For each of the 10 maps of a given size
-        for i in range(1, 11): #1...10   
 
-            # Take the map for the agent
+    def jobs(self, input_folder, m_size):
+        # For each of the maps of a given size, each of the algorithms and heuristics
+        for i in range(1, self.n_maps + 1):
             fileinput_str = str.format("{}/{}x{}_{}.txt", input_folder, m_size, m_size, i)
-            agent = self.agent(fileinput_str)
-
-            # Control variables to cycle through all the algorithms and heuristics
-            actual_algorithm = 0
-            only_once = True
-
-            # For each of the algorithms and heuristics
-            for search_f in self.search_funcs:
-                for heuris_f in self.heuris_funcs:
-
-                    # If it is the astar algorithm, the heuristics are taken into account, if not, no
-                    if(search_f == astar_search):
-                        # Get solution       
-                        is_solved, solution, explored, frontier = agent.solve(search_f, heuris_f)
-                    
-                    elif only_once:
-                        only_once = not only_once
-                        # Get solution
-                        is_solved, solution, explored, frontier = agent.solve(search_f)
-                    
-                    else:
-                        only_once = not only_once
-                        break
-
-                    # Get previous values in table performance
-                    d,g,nE,nF,cont_solv = self.table_performance[actual_algorithm]
-
-                    # Update table performance
-                    if(is_solved):
-                        cont_solv += 1
-                        d += solution.depth
-                        g += solution.path_cost
-                        nE += len(explored)
-                        nF += len(frontier)
-
-                    self.table_performance[actual_algorithm] = [d,g,nE,nF,cont_solv]
-                    
-                    # Go to next algorithm
-                    actual_algorithm += 1
+            for row, (search_f, heuris_f) in enumerate(self.combinations):
+                key = (os.path.basename(fileinput_str), name_of(search_f), name_of(heuris_f))
+                yield row, key, (self.agent, fileinput_str, search_f, heuris_f, self.max_nodes, self.max_time)
+
+
+    def run_jobs(self, jobs):
+        # Run every job and yield its row and key in the table with its statistics, as they complete
+        if self.processes == 1:
+            # Prevent prints for being shown in terminal
+            blockPrint()
+            try:
+                for row, key, job in jobs:
+                    result = run_job(*job)
+                    enablePrint()
+                    yield row, key, result
+                    blockPrint()
+            finally:
+                _agents.clear()
+                enablePrint()
+            return
+
+        # A process that dies breaks the pool and every job still in it, so those jobs run
+        # again each in a pool of its own, where only the job that kills its process fails
+        batches, isolated = [list(jobs)], False
+        while batches:
+            broken = []
+            for batch in batches:
+                with ProcessPoolExecutor(max_workers=1 if isolated else self.processes,
+                                         initializer=blockPrint) as executor:
+                    futures = {executor.submit(run_job, *job): (row, key, job) for row, key, job in batch}
+                    for future in as_completed(futures):
+                        row, key, job = futures[future]
+                        try:
+                            result = future.result()
+                        except BrokenProcessPool as e:
+                            if not isolated:
+                                broken.append((row, key, job))
+                                continue
+                            print(f"{' '.join(key)}: {type(e).__name__}: {e}", file=sys.stderr)
+                            result = (ERROR, 0, 0, 0, 0, 0.0)
+                        yield row, key, result
+            batches, isolated = [[job] for job in broken], True
+
+
+    def finished_jobs(self, jobs_file):
+        # Results of the jobs already in the file of jobs, by key (failed jobs are run again)
+        finished = {}
+        if jobs_file is not None and os.path.exists(jobs_file):
+            with open(jobs_file, newline='') as fp:
+                for line in csv.DictReader(fp):
+                    if line['status'] == ERROR:
+                        continue
+                    result = (line['status'], int(line['depth']), int(line['cost']),
+                              int(line['explored']), int(line['frontier']), float(line['time']))
+                    finished[(line['map'], line['method'], line['heuristic'])] = result
+        return finished
+
+
+    def add_result(self, row, result):
+        is_solved, depth, cost, n_explored, n_frontier, job_time = result
+        self.job_times[row].append(job_time)
+
+        # Get previous values in table performance
+        d,g,nE,nF,cont_solv = self.table_performance[row]
+
+        # Update table performance
+        if is_solved == SOLVED:
+            cont_solv += 1
+            d += depth
+            g += cost
+            nE += n_explored
+            nF += n_frontier
+        elif is_solved == BUDGET_EXCEEDED:
+            self.exceeded[row] += 1
+        elif is_solved == ERROR:
+            self.failed[row] += 1
+
+        self.table_performance[row] = [d,g,nE,nF,cont_solv]
+
+
+    def evaluate(self, input_folder, m_size, jobs_file=None):
+        """Runs every job on the maps of a size and returns the table of averages over the
+        solved maps. The result of each job is appended to jobs_file as soon as it completes,
+        and the jobs already in that file are not run again."""
+        start_time = time.time()
 
+        finished = self.finished_jobs(jobs_file)
+        pending = []
+        for row, key, job in self.jobs(input_folder, m_size):
+            if key in finished:
+                self.add_result(row, finished[key])
+            else:
+                pending.append((row, key, job))
+
+        fp = None
+        if jobs_file is not None:
+            new_file = not os.path.exists(jobs_file)
+            fp = open(jobs_file, 'a', newline='')
+            writer = csv.writer(fp)
+            if new_file:
+                writer.writerow(JOB_FIELDS)
+        try:
+            for row, key, result in self.run_jobs(pending):
+                self.add_result(row, result)
+                if fp is not None:
+                    writer.writerow([*key, *result])
+                    fp.flush()
+        finally:
+            if fp is not None:
+                fp.close()
 
         # Compute averages (divide by the number of solved problems)
         for i in range(0,len(self.table_performance)):
             d, g,nE,nF,cont_solv = self.table_performance[i]
-            self.table_performance[i] = [d/cont_solv, g/cont_solv,nE/cont_solv,nF/cont_solv]
+            if cont_solv:
+                self.table_performance[i] = [d/cont_solv, g/cont_solv,nE/cont_solv,nF/cont_solv]
+            else:
+                # No map was solved, there is nothing to average
+                status = BUDGET_EXCEEDED if self.exceeded[i] else ERROR if self.failed[i] else NOT_SOLVED
+                self.table_performance[i] = [status] * 4
 
         elapsed_time = time.time() - start_time
-        
-        # Enable prints in terminal
-        enablePrint()
-        
+
         print(f'Results found in {elapsed_time:.2f} seconds.')
-        
-        return self.table_performance
\ No newline at end of file
+        print(f'Time spent in jobs: {sum(map(sum, self.job_times)):.2f} seconds.')
+        print(f'Jobs over budget: {sum(self.exceeded)}, failed: {sum(self.failed)}, already done: {len(finished)}.')
+
+        return self.table_performance
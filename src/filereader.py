@@ -14,6 +14,7 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 from .state import State
+from .binarymap import is_binary_map, read_binary_map
 
 class FileReader:
 
@@ -21,6 +22,11 @@ class FileReader:
         # File with the information
         self.filename = filename
 
+        # Binary maps are memory-mapped instead of parsed
+        if is_binary_map(self.filename):
+            self.matrix_size, self.matrix, self.initial_state, self.goal_state = read_binary_map(self.filename)
+            return
+
         # Read the information from the file
         with open(self.filename, 'r') as fp:
             self.matrix_size = self.read_map_size(fp)
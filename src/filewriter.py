@@ -13,55 +13,126 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-import random
-from .state import State
+# Random maps for the performance report and the benchmarks. Generate maps from the shell with:
+#   python -m src.filewriter folder size [size ...] [--maps 10] [--seed 0] [--distribution uniform] [--binary]
+
+# NumPy is imported by the functions generating maps, so main.py can read and solve maps
+# without it.
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from .binarymap import HEADER, MAGIC, VERSION
+from .shared import make_dirs
+
+# Hardness of the generated cells
+MIN_HARDNESS, MAX_HARDNESS = 1, 9
+
+# Ways of spreading the hardness over the map
+DISTRIBUTIONS = ('uniform', 'strata', 'bands')
+
+
+def generate_map(rng, rows, cols, distribution='uniform'):
+    """Returns a rows x cols uint8 array of hardness values drawn from rng:
+    uniform: every cell independent.
+    strata: horizontal layers of random thickness, each with its own hardness plus or minus one.
+    bands: soft ground crossed by bands of the hardest rock, each with a soft gap."""
+    import numpy as np
+    if distribution == 'uniform':
+        return rng.integers(MIN_HARDNESS, MAX_HARDNESS + 1, size=(rows, cols), dtype=np.uint8)
+
+    if distribution == 'strata':
+        # A new layer starts on average every 1/8 of the rows
+        layer = np.cumsum(rng.random(rows) < 8 / max(rows, 8))
+        base = rng.integers(MIN_HARDNESS, MAX_HARDNESS + 1, size=layer[-1] + 1)
+        noise = rng.integers(-1, 2, size=(rows, cols))
+        return np.clip(base[layer][:, None] + noise, MIN_HARDNESS, MAX_HARDNESS).astype(np.uint8)
+
+    if distribution == 'bands':
+        grid = rng.integers(MIN_HARDNESS, MAX_HARDNESS // 2 + 1, size=(rows, cols), dtype=np.uint8)
+        # Bands every 4 rows, leaving the first and last rows (start and goal) free
+        band_rows = np.arange(2, rows - 1, 4)
+        grid[band_rows, :] = MAX_HARDNESS
+        grid[band_rows, rng.integers(0, cols, size=len(band_rows))] = MIN_HARDNESS
+        return grid
+
+    raise ValueError(f"Unknown distribution: {distribution}")
+
+
+def map_text(grid, initial, goal):
+    """Text map of a grid of single digit hardness values, built as one bytes object."""
+    import numpy as np
+    rows, cols = grid.shape
+    # Every cell is a digit followed by a space, or by the end of the line for the last column
+    body = np.full((rows, 2 * cols), ord(' '), dtype=np.uint8)
+    body[:, 0::2] = grid + ord('0')
+    body[:, -1] = ord('\n')
+    return b"".join((f"{rows} {cols}\n".encode(), body.tobytes(),
+                     "{} {} {}\n{} {} {}".format(*initial, *goal).encode()))
+
+
+def map_binary(grid, initial, goal):
+    """Map in the format of src.binarymap, built as one bytes object."""
+    rows, cols = grid.shape
+    return HEADER.pack(MAGIC, VERSION, 0, rows, cols, *initial, *goal) + grid.tobytes()
+
+
+def write_file(filename, seed, rows, cols, distribution, binary):
+    # Generate and write one map, going from the top left corner to the bottom right one
+    import numpy as np
+    grid = generate_map(np.random.default_rng(seed), rows, cols, distribution)
+    data = (map_binary if binary else map_text)(grid, (0, 0, 0), (rows - 1, cols - 1, 8))
+    with open(filename, 'wb') as fp:
+        fp.write(data)
+    return filename
+
 
 class FileWriter:
 
-    def __init__(self, folder, matrix_size):
+    def __init__(self, folder, matrix_size, seed=None, distribution='uniform', binary=False):
         self.folder = folder
-        self.matrix_size = matrix_size
-
-    def create_files(self):
-        # Create 10 matrixes of the given size
-        for i in range(1, 11):  # 1...10
-
-            # String to get the location of the folder
-            foldr_str = str.format(
-                "{}/{}x{}_{}.txt", self.folder, self.matrix_size, self.matrix_size, i
-            )
-
-            # Write the information in the file
-            with open(foldr_str, 'w') as fp:
-                self.write_map_size(fp)
-                self.write_map(fp)
-                self.write_initial_state(fp)
-                self.write_goal_state(fp)
-
-    def write_map_size(self, fp):
-        # Write map size in proper format to file
-        fp.write(str(self.matrix_size)+" "+str(self.matrix_size) + "\n")
-
-    def write_map(self, fp):
-        # Go through the rows of the matrix
-        for i in range(0, self.matrix_size):
-            numbers = []
-
-            # Go through the columns of the matrix
-            for j in range(0, self.matrix_size):
-                # Generate a random value for the row i and column j
-                elem_val = str(random.randint(1, 9))
-                numbers.append(elem_val)
-
-            # Join all numbers of the line in a string
-            line = " ".join([num for num in numbers])
-            # Write the line of map in proper format to file
-            fp.write(line + "\n")
-
-    def write_initial_state(self, fp):
-        # Write initial state in proper format to file
-        fp.write("0 0 0\n")
-
-    def write_goal_state(self, fp):
-        # Write goal state in proper format to file
-        fp.write(str.format("{} {} {}", self.matrix_size-1, self.matrix_size-1, 8))
+        # Square size or (rows, cols)
+        self.rows, self.cols = (matrix_size, matrix_size) if isinstance(matrix_size, int) else matrix_size
+        self.seed = seed
+        self.distribution = distribution
+        self.binary = binary
+
+    def filename(self, i):
+        # Location of the i-th map of the folder (numbered from 1)
+        extension = "bin" if self.binary else "txt"
+        return str.format("{}/{}x{}_{}.{}", self.folder, self.rows, self.cols, i, extension)
+
+    def create_files(self, count=10, processes=1):
+        """Create count maps of the given size. Each map has its own seed derived from
+        the seed of the writer, so a seed always gives the same files, whatever the number
+        of processes. Returns the names of the files."""
+        import numpy as np
+        seeds = np.random.SeedSequence(self.seed).spawn(count)
+        jobs = [(self.filename(i), seed, self.rows, self.cols, self.distribution, self.binary)
+                for i, seed in enumerate(seeds, 1)]
+
+        if processes == 1:
+            return [write_file(*job) for job in jobs]
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            return list(executor.map(write_file, *zip(*jobs)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate random maps')
+    parser.add_argument('folder', help='Folder of the maps')
+    parser.add_argument('sizes', type=int, nargs='+', help='Sizes of the square maps')
+    parser.add_argument('--maps', type=int, default=10, help='Maps of each size')
+    parser.add_argument('--seed', type=int, default=None, help='Seed of the maps (default: random)')
+    parser.add_argument('--distribution', default='uniform', choices=DISTRIBUTIONS, help='Hardness distribution')
+    parser.add_argument('--binary', action='store_true', help='Write the binary format of src.binarymap')
+    parser.add_argument('--processes', type=int, default=None, help='Number of worker processes (default: all cores)')
+    args = parser.parse_args()
+
+    make_dirs(args.folder)
+    for m_size in args.sizes:
+        writer = FileWriter(args.folder, m_size, args.seed, args.distribution, args.binary)
+        for filename in writer.create_files(args.maps, args.processes):
+            print(filename)
+
+
+if __name__ == "__main__":
+    main()
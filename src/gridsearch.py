@@ -0,0 +1,260 @@
+# Copyright (C) 2024  Jose Ángel Pérez Garrido
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import heapq
+from array import array
+from collections import OrderedDict
+from aima.search import Node
+from .shared import forget_digest
+from .state import State
+
+# Number of orientations a robot can have in a cell (North ... Northwest)
+ORIENTATIONS = 8
+
+# Positions of the actions in MiningProblem.actions_list
+FORWARD, CLOCKWISE, COUNTERCLOCKWISE = 0, 1, 2
+
+# Maximum number of map graphs kept in memory
+GRAPH_CACHE_SIZE = 8
+
+
+class GridGraph:
+    """State space of a map encoded in flat arrays. Each state (row, col, orientation)
+    is the integer index (row * cols + col) * 8 + orientation."""
+
+    def __init__(self, map, matrix_size):
+        self.map = map
+        self.matrix_size = matrix_size
+        rows, cols = matrix_size
+        self.n_cells = rows * cols
+        self.n_states = self.n_cells * ORIENTATIONS
+
+        # Successor and cost of moving forward from every state (-1 if it leaves the map)
+        self.forward = array('l', [-1]) * self.n_states
+        self.forward_cost = array('l', [0]) * self.n_states
+
+        for x in range(rows):
+            for y in range(cols):
+                base = (x * cols + y) * ORIENTATIONS
+                for o in range(ORIENTATIONS):
+                    dx, dy = State.ORIENTATION_TRAD[o]
+                    nx, ny = x + dx, y + dy
+                    if 0 <= nx < rows and 0 <= ny < cols:
+                        self.forward[base + o] = (nx * cols + ny) * ORIENTATIONS + o
+                        self.forward_cost[base + o] = map[nx][ny]
+
+    def index(self, x, y, o):
+        # Integer index of a state
+        return (x * self.matrix_size[1] + y) * ORIENTATIONS + o
+
+    def cell(self, x, y):
+        # Integer index of a cell
+        return x * self.matrix_size[1] + y
+
+    def decode(self, idx):
+        # Row, column and orientation of a state index
+        cell, o = divmod(idx, ORIENTATIONS)
+        x, y = divmod(cell, self.matrix_size[1])
+        return x, y, o
+
+    def state(self, idx):
+        # State object of a state index
+        return State(*self.decode(idx))
+
+    def set_hardness(self, x, y, hardness):
+        # Update the cost of the forward moves entering a cell (the map itself is not changed)
+        for o in range(ORIENTATIONS):
+            dx, dy = State.ORIENTATION_TRAD[o]
+            if 0 <= x - dx < self.matrix_size[0] and 0 <= y - dy < self.matrix_size[1]:
+                self.forward_cost[self.index(x - dx, y - dy, o)] = hardness
+
+    def predecessors(self, idx):
+        """Returns (action, predecessor, cost) for every state index that reaches idx with one action."""
+        base = idx - idx % ORIENTATIONS
+        o = idx % ORIENTATIONS
+        x, y, _ = self.decode(idx)
+        dx, dy = State.ORIENTATION_TRAD[o]
+        pred = []
+        if 0 <= x - dx < self.matrix_size[0] and 0 <= y - dy < self.matrix_size[1]:
+            prev = self.index(x - dx, y - dy, o)
+            pred.append((FORWARD, prev, self.forward_cost[prev]))
+        pred.append((CLOCKWISE, base + (o - 1) % ORIENTATIONS, 1))
+        pred.append((COUNTERCLOCKWISE, base + (o + 1) % ORIENTATIONS, 1))
+        return pred
+
+    def successors(self, idx):
+        """Returns (action, successor, cost) for every action applicable in a state index."""
+        base = idx - idx % ORIENTATIONS
+        o = idx % ORIENTATIONS
+        succ = []
+        if self.forward[idx] >= 0:
+            succ.append((FORWARD, self.forward[idx], self.forward_cost[idx]))
+        succ.append((CLOCKWISE, base + (o + 1) % ORIENTATIONS, 1))
+        succ.append((COUNTERCLOCKWISE, base + (o - 1) % ORIENTATIONS, 1))
+        return succ
+
+
+_graph_cache = OrderedDict()
+
+def grid_graph(problem):
+    """Returns the GridGraph of the problem map, building it only the first time the map is seen."""
+    key = (id(problem.map), tuple(problem.matrix_size))
+    entry = _graph_cache.get(key)
+    # Keep a reference to the map so its id cannot be reused while cached
+    if entry is not None and entry.map is problem.map:
+        _graph_cache.move_to_end(key)
+        return entry
+
+    graph = GridGraph(problem.map, problem.matrix_size)
+    _graph_cache[key] = graph
+    if len(_graph_cache) > GRAPH_CACHE_SIZE:
+        _graph_cache.popitem(last=False)
+    return graph
+
+
+def forget_map(map):
+    # Drop the cached graph and digest of a map whose content has changed
+    key = next((key for key, graph in _graph_cache.items() if graph.map is map), None)
+    if key is not None:
+        del _graph_cache[key]
+    forget_digest(map)
+
+
+def cell_costs(graph, x, y, neighbours):
+    """Dijkstra from every orientation of a cell, following neighbours(idx), which gives
+    (action, state, cost) tuples. Returns the cost of each state index (-1 if unreachable)."""
+    costs = array('l', [-1]) * graph.n_states
+    first = graph.index(x, y, 0)
+    frontier = []
+    for idx in range(first, first + ORIENTATIONS):
+        costs[idx] = 0
+        frontier.append((0, idx))
+
+    while frontier:
+        c, idx = heapq.heappop(frontier)
+        if c > costs[idx]:
+            continue
+        for _, neighbour, step in neighbours(idx):
+            new_cost = c + step
+            if costs[neighbour] < 0 or new_cost < costs[neighbour]:
+                costs[neighbour] = new_cost
+                heapq.heappush(frontier, (new_cost, neighbour))
+
+    return costs
+
+
+def backward_costs(graph, goal_x, goal_y):
+    """Dijkstra from every orientation of the goal cell over the reversed actions.
+    Returns the exact cost to reach the goal from each state index (-1 if unreachable)."""
+    return cell_costs(graph, goal_x, goal_y, graph.predecessors)
+
+
+def forward_costs(graph, x, y):
+    """Dijkstra from every orientation of a cell. Returns the exact cost to reach each
+    state index from the closest orientation of the cell (-1 if unreachable)."""
+    return cell_costs(graph, x, y, graph.successors)
+
+
+def state_heuristic(problem, graph):
+    """Returns a function giving problem.h for a state index, evaluating each state only once."""
+    if problem.h_function is None:
+        return lambda idx: 0
+
+    cache = array('d', [-1.0]) * graph.n_states
+    def h(idx):
+        value = cache[idx]
+        if value < 0:
+            value = cache[idx] = problem.h(Node(graph.state(idx)))
+        return value
+    return h
+
+
+def build_solution(problem, graph, parent, parent_action, cost, idx):
+    """Rebuilds the aima Node chain from the root to a state index."""
+    chain = []
+    while idx >= 0:
+        chain.append(idx)
+        idx = parent[idx]
+
+    node = Node(problem.initial)
+    for idx in reversed(chain[:-1]):
+        node = Node(graph.state(idx), node, problem.actions_list[parent_action[idx]], cost[idx])
+    return node
+
+
+def trace_expansion(problem, graph, idx, successors):
+    # Report an expansion to the tracer of the problem as MiningProblem would do
+    state = graph.state(idx)
+    problem.tracer.expanded(state)
+    if successors[0][0] != FORWARD:
+        problem.tracer.blocked(state, problem.actions_list[FORWARD])
+    for action, _, _ in successors:
+        problem.tracer.result(state, problem.actions_list[action])
+
+
+def grid_astar_search(problem):
+    """A* search over the integer encoding of the state space. Costs, parents and the
+    explored set are kept in flat arrays and only the solution path is turned into Nodes.
+    Returns the same (is_solved, solution, explored, frontier) tuple as astar_search."""
+    graph = grid_graph(problem)
+    h = state_heuristic(problem, graph)
+    goal_cell = graph.cell(problem.goal.x, problem.goal.y)
+    start = graph.index(problem.initial.x, problem.initial.y, problem.initial.orientation)
+
+    cost = array('l', [-1]) * graph.n_states
+    parent = array('l', [-1]) * graph.n_states
+    parent_action = array('b', [-1]) * graph.n_states
+    closed = bytearray(graph.n_states)
+    explored = []
+
+    cost[start] = 0
+    # Entries are (f, insertion order, state index); the counter keeps ties in FIFO order
+    frontier = [(h(start), 0, start)]
+    counter = 1
+
+    while frontier:
+        _, _, idx = heapq.heappop(frontier)
+        if closed[idx]:
+            continue
+
+        if idx // ORIENTATIONS == goal_cell:
+            solution = build_solution(problem, graph, parent, parent_action, cost, idx)
+            return True, solution, explored, open_states(frontier, closed)
+
+        closed[idx] = 1
+        explored.append(idx)
+        g = cost[idx]
+
+        successors = graph.successors(idx)
+        if problem.tracer is not None:
+            trace_expansion(problem, graph, idx, successors)
+
+        for action, succ, step in successors:
+            if closed[succ]:
+                continue
+            new_cost = g + step
+            if cost[succ] < 0 or new_cost < cost[succ]:
+                cost[succ] = new_cost
+                parent[succ] = idx
+                parent_action[succ] = action
+                heapq.heappush(frontier, (new_cost + h(succ), counter, succ))
+                counter += 1
+
+    return False, Node(problem.initial), explored, []
+
+
+def open_states(frontier, closed):
+    # States still waiting in the frontier, without the outdated heap entries
+    return {idx for _, _, idx in frontier if not closed[idx]}
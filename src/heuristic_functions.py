@@ -13,6 +13,14 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+from collections import OrderedDict
+from .gridsearch import grid_graph, backward_costs, ORIENTATIONS
+from .shared import map_digest
+from .landmarks import landmark_heuristic
+
+# Maximum number of cost-to-go tables kept in memory by h_perfect
+PERFECT_CACHE_SIZE = 16
+
 # Estimate cost based on Euclidean distance to the goal state
 def h1(self, node):
     dx = (self.goal.x - node.state.x)**2
@@ -61,3 +69,90 @@ def h3(self, node):
 
     # Returns the weighted distance between the state and the goal by adding the costs of the subsoil
     return weights
+
+
+def prefix_sums(map):
+    """Returns the row and column prefix sums of the map: rows[x][y] is the sum of
+    map[x][0..y-1] and cols[y][x] is the sum of map[0..x-1][y]."""
+    rows = []
+    for line in map:
+        acc = [0]
+        for value in line:
+            acc.append(acc[-1] + value)
+        rows.append(acc)
+
+    cols = []
+    for y in range(len(map[0])):
+        acc = [0]
+        for line in map:
+            acc.append(acc[-1] + line[y])
+        cols.append(acc)
+
+    return rows, cols
+
+# Same estimate as h3 computed in constant time with the prefix sums of the map
+def h3_prefix(self, node):
+    if self.prefix_sums is None:
+        # Built once per problem
+        self.prefix_sums = prefix_sums(self.map)
+    rows, cols = self.prefix_sums
+
+    state_x = node.state.x
+    state_y = node.state.y
+
+    target_x = self.goal.x
+    target_y = self.goal.y
+
+    # Cells crossed along the column of the state, without the starting cell
+    col = cols[state_y]
+    if state_x < target_x:
+        weights = col[target_x + 1] - col[state_x + 1]
+    else:
+        weights = col[state_x] - col[target_x]
+
+    # Cells crossed along the row of the target, without the corner cell
+    row = rows[target_x]
+    if state_y < target_y:
+        weights += row[target_y + 1] - row[state_y + 1]
+    else:
+        weights += row[state_y] - row[target_y]
+
+    # Returns the weighted distance between the state and the goal by adding the costs of the subsoil
+    return weights
+
+
+_cost_to_go_cache = OrderedDict()
+
+def cost_to_go_table(problem):
+    """Returns the exact cost-to-go table of the problem map and goal, computing it with a
+    backward Dijkstra only if it is not in the LRU cache."""
+    key = (map_digest(problem.map), tuple(problem.matrix_size), problem.goal.x, problem.goal.y)
+    if key in _cost_to_go_cache:
+        _cost_to_go_cache.move_to_end(key)
+        return _cost_to_go_cache[key]
+
+    table = backward_costs(grid_graph(problem), problem.goal.x, problem.goal.y)
+    _cost_to_go_cache[key] = table
+    if len(_cost_to_go_cache) > PERFECT_CACHE_SIZE:
+        _cost_to_go_cache.popitem(last=False)
+    return table
+
+# Exact cost to the goal state, taking hardness and rotations into account
+def h_perfect(self, node):
+    if self.cost_to_go is None:
+        self.cost_to_go = cost_to_go_table(self)
+
+    state = node.state
+    cost = self.cost_to_go[(state.x * self.matrix_size[1] + state.y) * ORIENTATIONS + state.orientation]
+
+    # Returns the cost of the optimal path from the state (infinite if the goal is unreachable)
+    return cost if cost >= 0 else float('inf')
+
+# Lower bound of the cost to the goal state from the exact costs to and from a few landmarks
+def h4(self, node):
+    if self.landmarks is None:
+        # The tables are built once per map content and saved next to the map file
+        self.landmarks = landmark_heuristic(self)
+
+    # Returns the highest triangle inequality bound over the landmarks
+    return self.landmarks(node.state)
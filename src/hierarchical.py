@@ -0,0 +1,304 @@
+# Copyright (C) 2024  Jose Ángel Pérez Garrido
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# The abstraction of a map is saved as the landmark tables are: next to the map file (or
+# in the landmarks folder if there is none), as a fixed header followed by the vertices,
+# the number of edges of each vertex, and the target and cost of every edge as int32.
+
+import heapq
+import os
+import struct
+from array import array
+from aima.search import Node
+from .gridsearch import grid_graph, trace_expansion, ORIENTATIONS
+from .landmarks import LANDMARKS_FOLDER_NAME
+from .shared import make_dirs, map_digest
+
+# Side of the square clusters the map is split into
+CLUSTER_SIZE = 16
+
+MAGIC = b'DRHP'
+VERSION = 1
+
+# magic, version, cluster size, rows, cols, map hash, vertex count, edge count
+HEADER = struct.Struct('<4sHHII16sII')
+
+# Orientations used to cross the borders between clusters
+NORTH, EAST, SOUTH, WEST = 0, 2, 4, 6
+
+# Abstract vertex standing for any state in the goal cell
+GOAL = -1
+
+
+def local_dijkstra(graph, sources, inside, reverse=False, goal_cell=None, problem=None):
+    """Dijkstra over the states whose cell satisfies inside(cell), starting from the
+    {state index: cost} sources. Backwards through the predecessors if reverse is set.
+    Stops when a state of goal_cell is expanded. The expansions are reported to the
+    tracer of problem, if given. Returns the costs, the {state: (previous state, action)}
+    parents, the expanded states and the states left in the frontier."""
+    dist = dict(sources)
+    parents = {}
+    expanded = []
+    frontier = [(cost, idx) for idx, cost in sources.items()]
+    heapq.heapify(frontier)
+    neighbours = graph.predecessors if reverse else graph.successors
+    tracer = problem.tracer if problem is not None else None
+
+    while frontier:
+        cost, idx = heapq.heappop(frontier)
+        if cost > dist[idx]:
+            continue
+        expanded.append(idx)
+        if idx // ORIENTATIONS == goal_cell:
+            break
+        steps = neighbours(idx)
+        if tracer is not None:
+            if reverse:
+                tracer.expanded(graph.state(idx))
+            else:
+                trace_expansion(problem, graph, idx, steps)
+        for action, other, step in steps:
+            if not inside(other // ORIENTATIONS):
+                continue
+            new_cost = cost + step
+            if other not in dist or new_cost < dist[other]:
+                dist[other] = new_cost
+                parents[other] = (idx, action)
+                heapq.heappush(frontier, (new_cost, other))
+
+    # Entries of states reached again more cheaply are stale
+    return dist, parents, expanded, [idx for cost, idx in frontier if cost == dist[idx]]
+
+
+class Abstraction:
+    """Cluster abstraction of a map for hierarchical pathfinding (HPA*). Its vertices are
+    the states entering and leaving each cluster through the entrances on its borders,
+    joined by the exact cost between them inside the cluster (rotations included) and by
+    the forward move crossing each entrance."""
+
+    def __init__(self, matrix_size, cluster_size, cluster_vertices, edges):
+        self.cluster_size = cluster_size
+        self.matrix_size = tuple(matrix_size)
+        rows, cols = self.matrix_size
+        self.n_clusters = ((rows + cluster_size - 1) // cluster_size, (cols + cluster_size - 1) // cluster_size)
+        # Abstract vertices (state indexes) of every cluster and outgoing edges of every vertex
+        self.cluster_vertices = cluster_vertices
+        self.edges = edges
+
+    @classmethod
+    def build(cls, graph, cluster_size=CLUSTER_SIZE):
+        abstraction = cls(graph.matrix_size, cluster_size, {}, {})
+        rows, cols = abstraction.matrix_size
+        C = cluster_size
+        for i in range(abstraction.n_clusters[0]):
+            for j in range(abstraction.n_clusters[1]):
+                # Border with the cluster on the right, crossed moving East or West
+                if (j + 1) * C < cols:
+                    for x in cls.entrance_points(i * C, min((i + 1) * C, rows) - 1):
+                        abstraction.add_entrance(graph, (x, (j + 1) * C - 1), (x, (j + 1) * C), EAST, WEST)
+                # Border with the cluster below, crossed moving South or North
+                if (i + 1) * C < rows:
+                    for y in cls.entrance_points(j * C, min((j + 1) * C, cols) - 1):
+                        abstraction.add_entrance(graph, ((i + 1) * C - 1, y), ((i + 1) * C, y), SOUTH, NORTH)
+
+        # Exact costs between the vertices of each cluster
+        for cluster, vertices in abstraction.cluster_vertices.items():
+            inside = lambda cell, cluster=cluster: abstraction.cell_cluster(cell) == cluster
+            for v in vertices:
+                dist, _, _, _ = local_dijkstra(graph, {v: 0}, inside)
+                abstraction.edges[v].extend((u, dist[u]) for u in vertices if u != v and u in dist)
+        return abstraction
+
+    @staticmethod
+    def entrance_points(lo, hi):
+        # Cells of a border used as entrances: the middle of short borders, both ends of long ones
+        if hi - lo < 5:
+            return [(lo + hi) // 2]
+        return [lo, hi]
+
+    def add_entrance(self, graph, a, b, forward, backward):
+        # Vertices and crossing edges of an entrance between cell a and cell b
+        a_out, b_in = graph.index(*a, forward), graph.index(*b, forward)
+        b_out, a_in = graph.index(*b, backward), graph.index(*a, backward)
+        for idx in (a_out, b_in, b_out, a_in):
+            if idx not in self.edges:
+                self.edges[idx] = []
+                self.cluster_vertices.setdefault(self.cell_cluster(idx // ORIENTATIONS), []).append(idx)
+        self.edges[a_out].append((b_in, graph.map[b[0]][b[1]]))
+        self.edges[b_out].append((a_in, graph.map[a[0]][a[1]]))
+
+    def cell_cluster(self, cell):
+        # Cluster containing a cell index
+        x, y = divmod(cell, self.matrix_size[1])
+        return (x // self.cluster_size) * self.n_clusters[1] + y // self.cluster_size
+
+    def save(self, filename, digest):
+        vertices = list(self.edges)
+        with open(filename, 'wb') as fp:
+            fp.write(HEADER.pack(MAGIC, VERSION, self.cluster_size, self.matrix_size[0], self.matrix_size[1],
+                                 digest, len(vertices), sum(map(len, self.edges.values()))))
+            fp.write(array('i', vertices).tobytes())
+            fp.write(array('i', (len(self.edges[v]) for v in vertices)).tobytes())
+            fp.write(array('i', (u for v in vertices for u, _ in self.edges[v])).tobytes())
+            fp.write(array('i', (cost for v in vertices for _, cost in self.edges[v])).tobytes())
+
+    @classmethod
+    def load(cls, filename, matrix_size, digest, cluster_size):
+        """Reads the abstraction of a file, or returns None if it was built for another
+        map content or cluster size."""
+        with open(filename, 'rb') as fp:
+            data = fp.read()
+        if len(data) < HEADER.size:
+            return None
+        magic, version, file_cluster_size, rows, cols, file_digest, n_vertices, n_edges = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION or file_digest != digest or \
+                (rows, cols) != tuple(matrix_size) or file_cluster_size != cluster_size or \
+                len(data) != HEADER.size + 4 * (2 * n_vertices + 2 * n_edges):
+            return None
+
+        values = array('i')
+        values.frombytes(data[HEADER.size:])
+        vertices = values[:n_vertices]
+        counts = values[n_vertices:2 * n_vertices]
+        targets = values[2 * n_vertices:2 * n_vertices + n_edges]
+        costs = values[2 * n_vertices + n_edges:]
+
+        abstraction = cls(matrix_size, cluster_size, {}, {})
+        start = 0
+        for v, count in zip(vertices, counts):
+            abstraction.edges[v] = list(zip(targets[start:start + count], costs[start:start + count]))
+            abstraction.cluster_vertices.setdefault(abstraction.cell_cluster(v // ORIENTATIONS), []).append(v)
+            start += count
+        return abstraction
+
+
+def map_abstraction(problem, cluster_size=CLUSTER_SIZE, folder=None):
+    """Returns the abstraction of the problem map. It is kept with the cached map graph
+    and saved next to the map file (or in the landmarks folder if there is none), so it
+    is only built the first time a map content is seen."""
+    graph = grid_graph(problem)
+    abstraction = getattr(graph, 'abstraction', None)
+    if abstraction is not None and abstraction.cluster_size == cluster_size:
+        return graph, abstraction
+
+    digest = map_digest(problem.map)
+    if problem.map_file is not None and folder is None:
+        filename = f"{problem.map_file}.{cluster_size}.hpa"
+    else:
+        folder = folder or os.path.join(os.getcwd(), LANDMARKS_FOLDER_NAME)
+        make_dirs(folder)
+        filename = os.path.join(folder, f"{digest}_{cluster_size}.hpa")
+
+    abstraction = None
+    if os.path.exists(filename):
+        abstraction = Abstraction.load(filename, problem.matrix_size, bytes.fromhex(digest), cluster_size)
+    if abstraction is None:
+        abstraction = Abstraction.build(graph, cluster_size)
+        abstraction.save(filename, bytes.fromhex(digest))
+
+    graph.abstraction = abstraction
+    return graph, abstraction
+
+
+def hierarchical_search(problem):
+    """Hierarchical pathfinding (HPA*). The start and goal are connected to the vertices of
+    their clusters, the abstract graph is searched, and the path is refined with a search
+    limited to the clusters the abstract path goes through. The expansions of the three
+    local searches and of the abstract search are reported to the tracer of the problem
+    (building the abstraction of a new map is not). Returns the same
+    (is_solved, solution, explored, frontier) tuple as the other search functions."""
+    graph, abstraction = map_abstraction(problem)
+    start = graph.index(problem.initial.x, problem.initial.y, problem.initial.orientation)
+    goal_cell = graph.cell(problem.goal.x, problem.goal.y)
+    start_cluster = abstraction.cell_cluster(start // ORIENTATIONS)
+    goal_cluster = abstraction.cell_cluster(goal_cell)
+    # States expanded by any of the three local searches, counted once
+    explored = set()
+
+    # Connect the start to the vertices of its cluster (and to the goal if it is there)
+    in_cluster = lambda cluster: (lambda cell: abstraction.cell_cluster(cell) == cluster)
+    dist, _, expanded, _ = local_dijkstra(graph, {start: 0}, in_cluster(start_cluster), problem=problem)
+    explored.update(expanded)
+    start_edges = [(v, dist[v]) for v in abstraction.cluster_vertices.get(start_cluster, []) if v in dist and v != start]
+    # The start may itself be a vertex crossing an entrance
+    start_edges.extend(abstraction.edges.get(start, []))
+    if start_cluster == goal_cluster:
+        costs = [dist[idx] for idx in range(goal_cell * ORIENTATIONS, (goal_cell + 1) * ORIENTATIONS) if idx in dist]
+        if costs:
+            start_edges.append((GOAL, min(costs)))
+
+    # Connect the vertices of the goal cluster to the goal
+    goal_states = {idx: 0 for idx in range(goal_cell * ORIENTATIONS, (goal_cell + 1) * ORIENTATIONS)}
+    dist, _, expanded, _ = local_dijkstra(graph, goal_states, in_cluster(goal_cluster), reverse=True, problem=problem)
+    explored.update(expanded)
+    to_goal = {v: dist[v] for v in abstraction.cluster_vertices.get(goal_cluster, []) if v in dist}
+
+    # Search the abstract graph
+    def edges(v):
+        if v == start:
+            return start_edges
+        if v in to_goal:
+            return abstraction.edges[v] + [(GOAL, to_goal[v])]
+        return abstraction.edges.get(v, [])
+
+    abstract_dist = {start: 0}
+    abstract_parent = {}
+    frontier = [(0, start)]
+    while frontier:
+        cost, v = heapq.heappop(frontier)
+        if v == GOAL:
+            break
+        if cost > abstract_dist[v]:
+            continue
+        if problem.tracer is not None:
+            problem.tracer.expanded(graph.state(v))
+        for u, step in edges(v):
+            if u not in abstract_dist or cost + step < abstract_dist[u]:
+                abstract_dist[u] = cost + step
+                abstract_parent[u] = v
+                heapq.heappush(frontier, (cost + step, u))
+
+    if GOAL not in abstract_dist:
+        return False, Node(problem.initial), explored, frontier
+
+    # Clusters crossed by the abstract path
+    corridor = {start_cluster, goal_cluster}
+    v = abstract_parent[GOAL]
+    while v != start:
+        corridor.add(abstraction.cell_cluster(v // ORIENTATIONS))
+        v = abstract_parent[v]
+
+    # Refine the path inside the corridor
+    dist, parents, expanded, frontier = local_dijkstra(graph, {start: 0},
+                                                       lambda cell: abstraction.cell_cluster(cell) in corridor,
+                                                       goal_cell=goal_cell, problem=problem)
+    explored.update(expanded)
+    end = expanded[-1]
+    if end // ORIENTATIONS != goal_cell:
+        # The goal cannot be reached without leaving the corridor
+        return False, Node(problem.initial), explored, frontier
+
+    chain = []
+    idx = end
+    while idx != start:
+        idx, action = parents[idx]
+        chain.append(action)
+    node = Node(problem.initial)
+    idx = start
+    for action in reversed(chain):
+        idx, step = next((succ, step) for a, succ, step in graph.successors(idx) if a == action)
+        node = Node(graph.state(idx), node, problem.actions_list[action], node.path_cost + step)
+
+    return True, node, explored, frontier
@@ -0,0 +1,181 @@
+# Copyright (C) 2024  Jose Ángel Pérez Garrido
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import heapq
+import math
+from array import array
+from aima.search import Node
+from .gridsearch import GridGraph, forget_map, ORIENTATIONS
+from .state import State
+
+INF = math.inf
+
+
+class IncrementalPlanner:
+    """D* Lite planner over the state space of a MiningProblem. The search runs backwards
+    from the goal, so when the hardness of some cells changes or the robot moves only the
+    states whose cost to the goal is affected are expanded again.
+
+        planner = IncrementalPlanner(problem)
+        is_solved, solution, explored, frontier = planner.plan()
+        ...
+        is_solved, solution, explored, frontier = planner.update({(x, y): hardness}, position)
+
+    The map of the problem is updated in place, so it must be a list of lists."""
+
+    def __init__(self, problem):
+        self.problem = problem
+        self.graph = GridGraph(problem.map, problem.matrix_size)
+        goal = self.graph.index(problem.goal.x, problem.goal.y, 0)
+        self.goals = range(goal, goal + ORIENTATIONS)
+        self.start = self.graph.index(problem.initial.x, problem.initial.y, problem.initial.orientation)
+        self.reset()
+
+    def reset(self):
+        # Forget everything and start a new search from the goal
+        n_states = self.graph.n_states
+        self.g = array('d', [INF]) * n_states
+        self.rhs = array('d', [INF]) * n_states
+        # Key each state has in the queue (None if it is not queued)
+        self.queued = {}
+        self.queue = []
+        self.km = 0
+        self.last = self.start
+        self.start_x, self.start_y, _ = self.graph.decode(self.start)
+        # Lowest cost of a forward move, used by the heuristic
+        self.min_cost = max(0, min(min(row) for row in self.problem.map))
+        self.expanded = []
+        for idx in self.goals:
+            self.rhs[idx] = 0
+            self.push(idx, self.key(idx))
+
+    def h(self, idx):
+        # Consistent lower bound of the cost between the robot and a state:
+        # every forward move changes the row or column distance by at most one
+        x, y, _ = self.graph.decode(idx)
+        return max(abs(x - self.start_x), abs(y - self.start_y)) * self.min_cost
+
+    def key(self, idx):
+        k = min(self.g[idx], self.rhs[idx])
+        return (k + self.h(idx) + self.km, k)
+
+    def push(self, idx, key):
+        self.queued[idx] = key
+        heapq.heappush(self.queue, (key, idx))
+
+    def top_key(self):
+        # Lowest key in the queue, dropping outdated entries
+        while self.queue:
+            key, idx = self.queue[0]
+            if self.queued.get(idx) == key:
+                return key
+            heapq.heappop(self.queue)
+        return (INF, INF)
+
+    def update_vertex(self, idx):
+        if idx not in self.goals:
+            self.rhs[idx] = min((step + self.g[succ] for _, succ, step in self.graph.successors(idx)), default=INF)
+        self.queued.pop(idx, None)
+        if self.g[idx] != self.rhs[idx]:
+            self.push(idx, self.key(idx))
+
+    def compute_shortest_path(self):
+        start = self.start
+        while self.top_key() < self.key(start) or self.rhs[start] != self.g[start]:
+            old_key, idx = heapq.heappop(self.queue)
+            del self.queued[idx]
+            new_key = self.key(idx)
+            if old_key < new_key:
+                self.push(idx, new_key)
+                continue
+
+            self.expanded.append(idx)
+            if self.g[idx] > self.rhs[idx]:
+                self.g[idx] = self.rhs[idx]
+                for _, pred, _ in self.graph.predecessors(idx):
+                    self.update_vertex(pred)
+            else:
+                self.g[idx] = INF
+                self.update_vertex(idx)
+                for _, pred, _ in self.graph.predecessors(idx):
+                    self.update_vertex(pred)
+
+    def solution(self):
+        # Follow the cheapest successors from the robot to the goal
+        problem = self.problem
+        idx = self.start
+        node = Node(State(*self.graph.decode(idx)))
+        if self.g[idx] == INF:
+            return False, node
+
+        while idx not in self.goals:
+            action, idx, step = min(self.graph.successors(idx), key=lambda s: s[2] + self.g[s[1]])
+            node = Node(State(*self.graph.decode(idx)), node, problem.actions_list[action], node.path_cost + step)
+        return True, node
+
+    def result(self):
+        # Same tuple as the search functions, with the states expanded by the last call
+        is_solved, solution = self.solution()
+        # Queued states with their current key, without the outdated entries of the heap
+        frontier = list(self.queued)
+        explored, self.expanded = self.expanded, []
+        return is_solved, solution, explored, frontier
+
+    def plan(self):
+        """Computes the initial plan from the robot to the goal."""
+        self.compute_shortest_path()
+        return self.result()
+
+    def update(self, changes, position=None):
+        """Applies new hardness values ({(x, y): hardness}) to the map, moves the robot to
+        position (a State) and repairs the plan."""
+        if position is not None:
+            self.start = self.graph.index(position.x, position.y, position.orientation)
+            self.problem.initial = position
+
+        changes = dict(changes)
+        if changes and min(changes.values()) < self.min_cost:
+            # The heuristic would not be a lower bound anymore, start again
+            self.apply_changes(changes)
+            self.reset()
+            return self.plan()
+
+        # Keys computed before the move are corrected by the distance travelled
+        # (h measures from the new position, so it is moved first)
+        self.start_x, self.start_y, _ = self.graph.decode(self.start)
+        self.km += self.h(self.last)
+        self.last = self.start
+
+        for x, y in self.apply_changes(changes):
+            # Only the forward moves entering the cell change their cost
+            for o in range(ORIENTATIONS):
+                dx, dy = State.ORIENTATION_TRAD[o]
+                if 0 <= x - dx < self.graph.matrix_size[0] and 0 <= y - dy < self.graph.matrix_size[1]:
+                    self.update_vertex(self.graph.index(x - dx, y - dy, o))
+
+        self.compute_shortest_path()
+        return self.result()
+
+    def apply_changes(self, changes):
+        # Write the new hardness in the map and the graph, returning the cells that changed
+        changed = []
+        for (x, y), hardness in changes.items():
+            if self.problem.map[x][y] != hardness:
+                self.problem.map[x][y] = hardness
+                self.graph.set_hardness(x, y, hardness)
+                changed.append((x, y))
+        if changed:
+            forget_map(self.problem.map)
+        return changed
@@ -0,0 +1,167 @@
+# Copyright (C) 2024  Jose Ángel Pérez Garrido
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# Landmark distance tables of the ALT heuristic. The file of a map stores a fixed header,
+# the landmark cells as int32 and, for each landmark, the cost from every state index to
+# the landmark and the cost from the landmark to every state index as native int32.
+
+import mmap
+import os
+import struct
+from array import array
+from collections import OrderedDict
+from .gridsearch import grid_graph, backward_costs, forward_costs, ORIENTATIONS
+from .shared import make_dirs, map_digest
+
+# Number of landmarks chosen in each map
+LANDMARK_COUNT = 4
+
+# Folder for the tables of maps that were not read from a file
+LANDMARKS_FOLDER_NAME = 'landmarks'
+
+# Maximum number of landmark tables kept open
+LANDMARK_CACHE_SIZE = 8
+
+MAGIC = b'DRLM'
+VERSION = 1
+
+# magic, version, landmark count, rows, cols, map hash
+HEADER = struct.Struct('<4sHHII16s')
+
+
+class LandmarkTables:
+    """Exact costs between every state and each landmark cell. to_landmark[i][idx] is the
+    cost from state idx to the closest orientation of landmark i, and from_landmark[i][idx]
+    the cost from the closest orientation of landmark i to state idx."""
+
+    def __init__(self, cells, to_landmark, from_landmark):
+        self.cells = cells
+        self.to_landmark = to_landmark
+        self.from_landmark = from_landmark
+
+    @classmethod
+    def build(cls, graph, count=LANDMARK_COUNT):
+        # Farthest landmark selection: start at a corner, then take the cell whose
+        # cost to the closest landmark chosen so far is the highest
+        cells, to_landmark, from_landmark = [], [], []
+        closest = [-1] * graph.n_cells
+        cell = 0
+        for _ in range(min(count, graph.n_cells)):
+            x, y = divmod(cell, graph.matrix_size[1])
+            cells.append(cell)
+            to_landmark.append(backward_costs(graph, x, y))
+            from_landmark.append(forward_costs(graph, x, y))
+
+            costs = to_landmark[-1]
+            for c in range(graph.n_cells):
+                cost = min(costs[c * ORIENTATIONS:(c + 1) * ORIENTATIONS])
+                if closest[c] < 0 or cost < closest[c]:
+                    closest[c] = cost
+            cell = max(range(graph.n_cells), key=closest.__getitem__)
+            if closest[cell] == 0:
+                # Every cell is already a landmark
+                break
+        return cls(cells, to_landmark, from_landmark)
+
+    def save(self, filename, matrix_size, digest):
+        with open(filename, 'wb') as fp:
+            fp.write(HEADER.pack(MAGIC, VERSION, len(self.cells), matrix_size[0], matrix_size[1], digest))
+            fp.write(array('i', self.cells).tobytes())
+            for to_costs, from_costs in zip(self.to_landmark, self.from_landmark):
+                fp.write(array('i', to_costs).tobytes())
+                fp.write(array('i', from_costs).tobytes())
+
+    @classmethod
+    def load(cls, filename, matrix_size, digest, count):
+        """Memory-maps the tables of a file, or returns None if they were built for
+        another map content or number of landmarks."""
+        with open(filename, 'rb') as fp:
+            if os.fstat(fp.fileno()).st_size < HEADER.size:
+                return None
+            buffer = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, n_landmarks, rows, cols, file_digest = HEADER.unpack_from(buffer)
+        n_states = rows * cols * ORIENTATIONS
+        if magic != MAGIC or version != VERSION or file_digest != digest or \
+                (rows, cols) != tuple(matrix_size) or n_landmarks != min(count, rows * cols) or \
+                len(buffer) != HEADER.size + 4 * n_landmarks * (1 + 2 * n_states):
+            buffer.close()
+            return None
+
+        view = memoryview(buffer)[HEADER.size:].cast('i')
+        cells = list(view[:n_landmarks])
+        tables = [view[n_landmarks + i * n_states:n_landmarks + (i + 1) * n_states]
+                  for i in range(2 * n_landmarks)]
+        return cls(cells, tables[0::2], tables[1::2])
+
+
+_tables_cache = OrderedDict()
+
+def landmark_tables(problem, count=LANDMARK_COUNT, folder=None):
+    """Returns the landmark tables of the problem map. They are saved next to the map file
+    (or in the landmarks folder if there is none) and memory-mapped when loaded again, so
+    they are only built the first time a map content is seen."""
+    digest = map_digest(problem.map)
+    key = (digest, tuple(problem.matrix_size), count)
+    if key in _tables_cache:
+        _tables_cache.move_to_end(key)
+        return _tables_cache[key]
+
+    if problem.map_file is not None and folder is None:
+        filename = f"{problem.map_file}.{count}.alt"
+    else:
+        folder = folder or os.path.join(os.getcwd(), LANDMARKS_FOLDER_NAME)
+        make_dirs(folder)
+        filename = os.path.join(folder, f"{digest}_{count}.alt")
+
+    tables = None
+    if os.path.exists(filename):
+        tables = LandmarkTables.load(filename, problem.matrix_size, bytes.fromhex(digest), count)
+    if tables is None:
+        tables = LandmarkTables.build(grid_graph(problem), count)
+        tables.save(filename, problem.matrix_size, bytes.fromhex(digest))
+
+    _tables_cache[key] = tables
+    if len(_tables_cache) > LANDMARK_CACHE_SIZE:
+        _tables_cache.popitem(last=False)
+    return tables
+
+
+def landmark_heuristic(problem):
+    """Returns a function giving the ALT lower bound of the cost from a state to the goal
+    cell of the problem. For a landmark L and the goal cell G, the triangle inequality gives
+        cost(s, G) >= cost(s, L) - max over g in G of cost(g, L)
+        cost(s, G) >= min over g in G of cost(L, g) - cost(L, s)
+    and the bound is the highest of them over all the landmarks. Every state can reach
+    every other one (moves are undone by rotating back), so all the costs are known."""
+    tables = landmark_tables(problem)
+    cols = problem.matrix_size[1]
+    first = (problem.goal.x * cols + problem.goal.y) * ORIENTATIONS
+    goal_states = range(first, first + ORIENTATIONS)
+
+    terms = []
+    for to_costs, from_costs in zip(tables.to_landmark, tables.from_landmark):
+        terms.append((to_costs, max(to_costs[g] for g in goal_states),
+                      from_costs, min(from_costs[g] for g in goal_states)))
+
+    def h(state):
+        idx = (state.x * cols + state.y) * ORIENTATIONS + state.orientation
+        best = 0
+        for to_costs, to_goal, from_costs, from_goal in terms:
+            bound = max(to_costs[idx] - to_goal, from_goal - from_costs[idx])
+            if bound > best:
+                best = bound
+        return best
+    return h
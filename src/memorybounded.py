@@ -0,0 +1,261 @@
+# Copyright (C) 2024  Jose Ángel Pérez Garrido
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import heapq
+import itertools
+import math
+from aima.search import Node
+from .shared import SolveResult, ItemCount
+
+# Default maximum number of nodes (or table entries) kept in memory
+MEMORY_CAP = 100000
+
+INF = math.inf
+
+# Tolerance of the rounding of real-valued heuristics
+EPSILON = 1e-9
+
+
+def ida_star_search(problem, max_nodes=MEMORY_CAP):
+    """Iterative deepening A*. Each iteration is a depth-first search bounded by f = g + h,
+    so only the current path is kept. As every action costs an integer, the bound is raised
+    to the next integer f each iteration (real-valued heuristics such as h1 would otherwise
+    raise it by tiny steps). A transposition table of the best g of each state in
+    the iteration prunes repeated states while the memory cap allows it.
+    Returns (is_solved, solution, explored, frontier) with the peak retained nodes in stats."""
+    h = lambda node: problem.h(node) or 0
+    root = Node(problem.initial)
+    if problem.goal_test(root.state):
+        return SolveResult((True, root, ItemCount(), ItemCount()), {'peak_nodes': 1, 'iterations': 0})
+
+    bound = math.ceil(h(root) - EPSILON)
+    expansions, peak, iterations = 0, 1, 0
+    while bound < INF:
+        iterations += 1
+        next_bound = INF
+        table = {root.state: 0}
+        on_path = {root.state}
+        stack = [(root, iter(root.expand(problem)))]
+        expansions += 1
+
+        while stack:
+            node, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                on_path.discard(node.state)
+                continue
+            if child.state in on_path:
+                continue
+
+            f = child.path_cost + h(child)
+            if f > bound:
+                # Action costs are integers, so no path costs less than the next integer
+                next_bound = min(next_bound, math.ceil(f - EPSILON))
+                continue
+            if problem.goal_test(child.state):
+                return SolveResult((True, child, ItemCount(expansions), ItemCount(len(stack))),
+                                   {'peak_nodes': peak, 'iterations': iterations})
+
+            # Already reached in this iteration with a lower or equal cost
+            seen = table.get(child.state)
+            if seen is not None and seen <= child.path_cost:
+                continue
+            if seen is not None or len(table) + len(stack) < max_nodes:
+                table[child.state] = child.path_cost
+
+            stack.append((child, iter(child.expand(problem))))
+            on_path.add(child.state)
+            expansions += 1
+            peak = max(peak, len(stack) + len(table))
+
+        bound = next_bound
+
+    return SolveResult((False, root, ItemCount(expansions), ItemCount()), {'peak_nodes': peak, 'iterations': iterations})
+
+
+class SMANode(Node):
+    """Search tree node of SMA*, which keeps the successors currently in memory, the
+    actions whose successors have not been generated yet and the backed-up f of the
+    successors that were forgotten."""
+
+    def __init__(self, state, parent=None, action=None, path_cost=0):
+        super().__init__(state, parent, action, path_cost)
+        self.f = 0
+        self.children = []
+        # Actions not generated yet (None until the node is expanded)
+        self.pending = None
+        # Backed-up f of the forgotten successors, by action
+        self.forgotten = {}
+        self.in_memory = True
+        self.version = 0
+
+    def has_successors(self):
+        # Some successor is not in memory and may still be generated
+        return self.pending is None or bool(self.pending) or bool(self.forgotten)
+
+
+def sma_star_search(problem, max_nodes=MEMORY_CAP):
+    """Simplified memory-bounded A*. Works as A* until max_nodes nodes are in memory, then
+    forgets the shallowest leaf with the highest f, backing its f up to its parent so the
+    subtree is only generated again when that f is the lowest one. A node whose successors
+    were all generated is worth its best successor. Successors that repeat a state of their
+    path, or that are too deep to keep their path in memory, are dropped, so the search
+    fails when no solution fits in max_nodes nodes. A table of the best g of each state
+    reached prunes the successors reaching a state with a higher g, or with the same g by
+    another path (the rotations of a cell can be reached in many orders). It has one entry
+    per state, not per node, and is not counted in max_nodes: bounding it by the cap makes
+    the search generate the same states again and again when the cap is below the number
+    of states reached. Optimal if the optimal path fits in memory.
+    Returns (is_solved, solution, explored, frontier) with the peak retained nodes and the
+    table entries in stats."""
+    h = lambda node: problem.h(node) or 0
+    counter = itertools.count()
+    best_heap, worst_heap = [], []
+    used, peak, expansions = 1, 1, 0
+    # Best g of each state, with the depth and (parent state, action) of the node kept for it
+    table = {problem.initial: (0, 0, None)}
+
+    def update(node):
+        # Queue a node again with its current f
+        node.version += 1
+        heapq.heappush(best_heap, (node.f, -node.depth, next(counter), node, node.version))
+        heapq.heappush(worst_heap, (-node.f, node.depth, next(counter), node, node.version))
+
+    def best_node():
+        # Lowest f, deepest first, among the nodes with successors to generate
+        while best_heap:
+            _, _, _, node, version = best_heap[0]
+            if node.in_memory and node.version == version and node.has_successors():
+                return node
+            heapq.heappop(best_heap)
+        return None
+
+    def worst_leaf(keep):
+        # Highest f, shallowest first, among the leaves but the root and keep
+        skipped, leaf = [], None
+        while worst_heap:
+            entry = heapq.heappop(worst_heap)
+            node, version = entry[3], entry[4]
+            if not node.in_memory or node.version != version or node.children:
+                continue
+            if node is keep or node.parent is None:
+                skipped.append(entry)
+                continue
+            leaf = node
+            break
+        for entry in skipped:
+            heapq.heappush(worst_heap, entry)
+        return leaf
+
+    def backup(node):
+        # Once all its successors were generated, a node is worth its best successor
+        while node is not None and node.pending is not None and not node.pending:
+            new_f = min([child.f for child in node.children] + list(node.forgotten.values()), default=INF)
+            if new_f == node.f:
+                break
+            node.f = new_f
+            update(node)
+            node = node.parent
+
+    def forget(leaf):
+        # Drop a leaf, keeping its f in the parent to generate it again if needed
+        nonlocal used
+        parent = leaf.parent
+        parent.children.remove(leaf)
+        leaf.in_memory = False
+        used -= 1
+        if leaf.f < INF:
+            parent.forgotten[leaf.action] = leaf.f
+        backup(parent)
+        update(parent)
+
+    def dominated(child):
+        # Whether another node reached the state of the child with a lower cost, or with
+        # the same cost in as few steps. A forgotten node is generated again from the same
+        # parent state and action, which is kept to recognize it.
+        seen = table.get(child.state)
+        if seen is None:
+            return False
+        g, depth, key = seen
+        return g < child.path_cost or (g == child.path_cost and depth <= child.depth and
+                                       key != (child.parent.state, child.action))
+
+    def live_leaves():
+        # Nodes in memory whose successors are not in memory
+        count, stack = 0, [root]
+        while stack:
+            node = stack.pop()
+            stack.extend(node.children)
+            count += not node.children
+        return count
+
+    def on_path(node, state):
+        while node is not None:
+            if node.state == state:
+                return True
+            node = node.parent
+        return False
+
+    root = SMANode(problem.initial)
+    root.f = h(root)
+    update(root)
+
+    while True:
+        best = best_node()
+        if best is None or best.f == INF:
+            return SolveResult((False, root, ItemCount(expansions), ItemCount(live_leaves())),
+                               {'peak_nodes': peak, 'table_entries': len(table)})
+        if problem.goal_test(best.state):
+            return SolveResult((True, best, ItemCount(expansions), ItemCount(live_leaves())),
+                               {'peak_nodes': peak, 'table_entries': len(table)})
+        if table[best.state][0] < best.path_cost:
+            # A cheaper path to its state was found after it was generated
+            best.f = INF
+            update(best)
+            backup(best.parent)
+            continue
+
+        if best.pending is None:
+            best.pending = list(problem.actions(best.state))
+            expansions += 1
+        if best.pending:
+            action, backed_up = best.pending.pop(0), 0
+        else:
+            # Generate again the forgotten successor with the lowest f
+            action = min(best.forgotten, key=best.forgotten.get)
+            backed_up = best.forgotten.pop(action)
+
+        next_state = problem.result(best.state, action)
+        child = SMANode(next_state, best, action, problem.path_cost(best.path_cost, best.state, action, next_state))
+        child.f = max(best.f, child.path_cost + h(child), backed_up)
+        if on_path(best, next_state) or (child.depth >= max_nodes - 1 and not problem.goal_test(next_state)) or \
+                dominated(child):
+            child.f = INF
+        if child.f < INF and used >= max_nodes:
+            leaf = worst_leaf(best)
+            if leaf is None:
+                child.f = INF
+            else:
+                forget(leaf)
+
+        if child.f < INF:
+            table[child.state] = (child.path_cost, child.depth, (best.state, action))
+            best.children.append(child)
+            used += 1
+            peak = max(peak, used)
+            update(child)
+        backup(best)
+        update(best)
@@ -17,13 +17,29 @@ from .actions import *
 from aima.search import *
 
 class MiningProblem(Problem):
-    def __init__(self, initial, map, matrix_size, h_function=None, goal=None):
+    def __init__(self, initial, map, matrix_size, h_function=None, goal=None, tracer=None, map_file=None,
+                 macro_actions=False):
         self.initial = initial
         self.goal = goal
         self.actions_list = [MoveForwardAction(), ClockwiseAction(), CounterClockwiseAction()]
+        # With macro_actions, the actions are "turn to an orientation and move forward"
+        # (appended after the three basic ones, which are kept to expand the solution)
+        self.macro_actions = macro_actions
+        if macro_actions:
+            self.actions_list += [TurnAndMoveAction(o) for o in range(8)]
         self.map = map
         self.matrix_size = matrix_size
         self.h_function = h_function
+        # Optional src.tracing.Tracer (None disables tracing)
+        self.tracer = tracer
+        # Row and column prefix sums of the map, built by h3_prefix when first needed
+        self.prefix_sums = None
+        # Exact cost to the goal of every state, looked up by h_perfect when first needed
+        self.cost_to_go = None
+        # File the map was read from (None if it was not), where h4 keeps its landmark tables
+        self.map_file = map_file
+        # Landmark lower bound of the cost to the goal, built by h4 when first needed
+        self.landmarks = None
 
 
     def actions(self, state):
@@ -38,6 +54,12 @@ class MiningProblem(Problem):
         max_x = self.matrix_size[0]-1
         max_y = self.matrix_size[1]-1
 
+        if self.tracer is not None:
+            self.tracer.expanded(state)
+
+        if self.macro_actions:
+            return self.macro_actions_from(state)
+
         # List of possible actions to perform depending on the current state
         actions = []
                 
@@ -45,14 +67,26 @@ class MiningProblem(Problem):
         if 0 <= x+state.movement[0] <= max_x and 0 <= y+state.movement[1] <= max_y:
             # Add it to the list of possible actions
             actions.append(self.actions_list[0])
-        else:
-            print(f"{state}: Action unavailable: {self.actions_list[0].name}")
+        elif self.tracer is not None:
+            self.tracer.blocked(state, self.actions_list[0])
 
         # Add CounterClockwise and Clockwise to the list of actions
         actions.append(self.actions_list[1])
         actions.append(self.actions_list[2])
 
         return actions
+
+
+    def macro_actions_from(self, state):
+        # Turn and move actions that do not leave the map
+        actions = []
+        for action in self.actions_list[3:]:
+            dx, dy = state.get_orientation(action.orientation)
+            if 0 <= state.x+dx < self.matrix_size[0] and 0 <= state.y+dy < self.matrix_size[1]:
+                actions.append(action)
+            elif self.tracer is not None:
+                self.tracer.blocked(state, action)
+        return actions
     
 
 
@@ -61,7 +95,8 @@ class MiningProblem(Problem):
         if not action in self.actions_list:
             raise ValueError(f"Invalid action: {action}")
 
-        print(action)
+        if self.tracer is not None:
+            self.tracer.result(state, action)
         new_state = action.execute(state)
         return new_state
 
@@ -77,6 +112,9 @@ class MiningProblem(Problem):
         if action.name == self.actions_list[0].name:
             cost_edge = self.map[state2.x][state2.y]
             action_cost = cost_edge
+        elif isinstance(action, TurnAndMoveAction):
+            # One per rotation plus the hardness of the cell entered
+            action_cost = action.turns(state1)[0] + self.map[state2.x][state2.y]
         else:
             action_cost = 1
 
@@ -84,6 +122,24 @@ class MiningProblem(Problem):
        
 
 
+    def expand_solution(self, node):
+        """Returns the solution node with each macro-action replaced by its rotations
+        and move forward, with the same path cost."""
+        if not any(isinstance(step.action, TurnAndMoveAction) for step in node.path()):
+            return node
+        forward, clockwise, counterclockwise = self.actions_list[:3]
+        expanded = Node(self.initial)
+        for step in node.path()[1:]:
+            actions = [step.action]
+            if isinstance(step.action, TurnAndMoveAction):
+                n_turns, is_clockwise = step.action.turns(expanded.state)
+                actions = [clockwise if is_clockwise else counterclockwise] * n_turns + [forward]
+            for action in actions:
+                state = action.execute(expanded.state)
+                expanded = Node(state, expanded, action, self.path_cost(expanded.path_cost, expanded.state, action, state))
+        return expanded
+
+
     def h(self, node):
         """Returns least possible cost to reach a goal for the given state."""
         if(self.h_function == None):
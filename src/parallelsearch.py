@@ -0,0 +1,383 @@
+# Copyright (C) 2024  Jose Ángel Pérez Garrido
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# Hash-distributed A* (HDA*). Every state belongs to the worker process given by the hash
+# of its cell, so the rotations of a state are expanded by the worker that owns it and only
+# the forward moves are sent to other workers, in batches. The workers read the hardness of
+# the map from shared memory.
+#
+# A worker is idle when it has no open state with f below the cost of the best solution
+# found so far. The search ends when two consecutive waves of the main process find every
+# worker idle, with as many batches received as sent and no counter changed between them,
+# so no batch is in flight and no worker can become active again.
+
+import heapq
+import math
+import multiprocessing
+import os
+import time
+import traceback
+from array import array
+from multiprocessing import shared_memory
+from queue import Empty
+from aima.search import Node
+from .gridsearch import ORIENTATIONS, FORWARD, CLOCKWISE, COUNTERCLOCKWISE
+from .heuristic_functions import h_perfect, cost_to_go_table
+from .miningproblem import MiningProblem
+from .shared import SolveResult, ItemCount
+from .state import State
+
+# States sent to another worker in one message
+BATCH_SIZE = 256
+
+# Expansions between two checks of the messages received by a busy worker
+POLL_INTERVAL = 64
+
+# Seconds between two waves of probes while some worker is still busy
+WAVE_INTERVAL = 0.002
+
+# Seconds the main process waits for a message before checking that the workers are alive
+LIVENESS_INTERVAL = 0.5
+
+# Events of a worker replayed on the tracer of the problem
+EXPANDED, GENERATED, BLOCKED = 0, 1, 2
+
+INF = math.inf
+
+
+def owner(idx, n_workers):
+    # Worker owning a state index, by a multiplicative hash of its cell
+    return ((((idx // ORIENTATIONS) * 2654435761) & 0xFFFFFFFF) >> 8) % n_workers
+
+
+def search_worker(rank, n_workers, shm_name, costs_name, matrix_size, initial, goal, h_function, map_file,
+                  inboxes, status, batch_size, traced):
+    """Runs the part of the search owned by worker rank until the main process stops it.
+    An exception is sent to the main process before the worker exits."""
+    try:
+        run_worker(rank, n_workers, shm_name, costs_name, matrix_size, initial, goal, h_function, map_file,
+                   inboxes, status, batch_size, traced)
+    except Exception:
+        status.put(('error', rank, traceback.format_exc()))
+        raise
+
+
+def run_worker(rank, n_workers, shm_name, costs_name, matrix_size, initial, goal, h_function, map_file,
+               inboxes, status, batch_size, traced):
+    rows, cols = matrix_size
+    shm = shared_memory.SharedMemory(name=shm_name)
+    hardness = shm.buf.cast('i')
+    grid = [hardness[x * cols:(x + 1) * cols] for x in range(rows)]
+    problem = MiningProblem(initial, grid, matrix_size, h_function, goal, map_file=map_file)
+    # Cost-to-go table of h_perfect, computed once by the main process
+    costs_shm = costs = None
+    if costs_name is not None:
+        costs_shm = shared_memory.SharedMemory(name=costs_name)
+        costs = problem.cost_to_go = costs_shm.buf.cast('l')
+    inbox = inboxes[rank]
+    goal_cell = goal.x * cols + goal.y
+
+    # Cost, parent and action of every owned state reached so far
+    g = {}
+    parent = {}
+    h_cache = {}
+    # Entries are (f, g, state index); an entry whose g is not g[idx] anymore is skipped
+    open_list = []
+    outboxes = [array('l') for _ in range(n_workers)]
+    # (event, state index, action) triples for the tracer of the main process, if it has one
+    events = array('l')
+    bound = INF
+    sent = received = expansions = 0
+
+    def h(idx):
+        value = h_cache.get(idx)
+        if value is None:
+            cell, o = divmod(idx, ORIENTATIONS)
+            value = problem.h(Node(State(cell // cols, cell % cols, o))) or 0
+            h_cache[idx] = value
+        return value
+
+    def reach(idx, cost, from_idx, action):
+        # Keep a path to an owned state if it is cheaper than the known one
+        known = g.get(idx)
+        if known is not None and known <= cost:
+            return
+        g[idx] = cost
+        parent[idx] = (from_idx, action)
+        f = cost + h(idx)
+        if f < bound:
+            heapq.heappush(open_list, (f, cost, idx))
+
+    def send(target):
+        nonlocal sent
+        inboxes[target].put(('states', outboxes[target].tobytes()))
+        outboxes[target] = array('l')
+        sent += 1
+
+    def handle(message):
+        # Returns False when the worker has to stop
+        nonlocal bound, received
+        kind = message[0]
+        if kind == 'states':
+            received += 1
+            batch = array('l')
+            batch.frombytes(message[1])
+            for i in range(0, len(batch), 4):
+                reach(batch[i], batch[i + 1], batch[i + 2], batch[i + 3])
+        elif kind == 'bound':
+            bound = min(bound, message[1])
+        elif kind == 'probe':
+            # States waiting in the outboxes are sent first, or the counters would show no
+            # batch in flight while this worker still has states for the others
+            for target in range(n_workers):
+                if outboxes[target]:
+                    send(target)
+            status.put(('count', rank, message[1], sent, received, is_idle(), events.tobytes()))
+            del events[:]
+        elif kind == 'path':
+            # Follow the parents while the states are owned by this worker
+            idx, steps = message[1], []
+            while idx >= 0 and owner(idx, n_workers) == rank:
+                from_idx, action = parent[idx]
+                steps.append((idx, action))
+                idx = from_idx
+            status.put(('path', steps, idx))
+        elif kind == 'stop':
+            status.put(('done', rank, expansions, sum(1 for f, cost, idx in open_list if g[idx] == cost),
+                        events.tobytes()))
+            return False
+        return True
+
+    def is_idle():
+        # Drop outdated entries and check whether an entry may still improve the solution
+        while open_list and (open_list[0][1] != g[open_list[0][2]] or open_list[0][0] >= bound):
+            if open_list[0][0] >= bound:
+                return True
+            heapq.heappop(open_list)
+        return not open_list
+
+    start = (initial.x * cols + initial.y) * ORIENTATIONS + initial.orientation
+    if owner(start, n_workers) == rank:
+        reach(start, 0, -1, -1)
+
+    try:
+        running = True
+        while running:
+            if is_idle():
+                for target in range(n_workers):
+                    if outboxes[target]:
+                        send(target)
+                running = handle(inbox.get())
+                continue
+
+            _, cost, idx = heapq.heappop(open_list)
+            cell, o = divmod(idx, ORIENTATIONS)
+            if cell == goal_cell:
+                # Every open state has f >= cost from now on in this worker
+                bound = cost
+                status.put(('goal', cost, idx))
+                for target in range(n_workers):
+                    if target != rank:
+                        inboxes[target].put(('bound', cost))
+                continue
+
+            expansions += 1
+            if traced:
+                events.extend((EXPANDED, idx, -1))
+            x, y = divmod(cell, cols)
+            base = cell * ORIENTATIONS
+            dx, dy = State.ORIENTATION_TRAD[o]
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < rows and 0 <= ny < cols:
+                if traced:
+                    events.extend((GENERATED, idx, FORWARD))
+                succ = (nx * cols + ny) * ORIENTATIONS + o
+                step = hardness[nx * cols + ny]
+                target = owner(succ, n_workers)
+                if target == rank:
+                    reach(succ, cost + step, idx, FORWARD)
+                else:
+                    outboxes[target].extend((succ, cost + step, idx, FORWARD))
+                    if len(outboxes[target]) >= 4 * batch_size:
+                        send(target)
+            elif traced:
+                events.extend((BLOCKED, idx, FORWARD))
+            if traced:
+                events.extend((GENERATED, idx, CLOCKWISE, GENERATED, idx, COUNTERCLOCKWISE))
+            reach(base + (o + 1) % ORIENTATIONS, cost + 1, idx, CLOCKWISE)
+            reach(base + (o - 1) % ORIENTATIONS, cost + 1, idx, COUNTERCLOCKWISE)
+
+            if expansions % POLL_INTERVAL == 0:
+                try:
+                    while running:
+                        running = handle(inbox.get_nowait())
+                except Empty:
+                    pass
+    finally:
+        # The views of the shared blocks have to be released before closing them
+        grid.clear()
+        hardness.release()
+        shm.close()
+        if costs_shm is not None:
+            problem.cost_to_go = None
+            costs.release()
+            costs_shm.close()
+
+
+def shared_block(data):
+    # Shared memory block holding a copy of the bytes
+    shm = shared_memory.SharedMemory(create=True, size=max(len(data), 1))
+    shm.buf[:len(data)] = data
+    return shm
+
+
+def parallel_astar_search(problem, workers=None, batch_size=BATCH_SIZE):
+    """A* search split among worker processes by the hash of the state cells (HDA*).
+    The solution found has the same cost as astar_search with the same admissible
+    heuristic (h_perfect, h4 or none). The expansions of the workers are reported to the
+    tracer of the problem by the main process between two waves of probes, so a budget
+    of a BudgetTracer may be exceeded by the expansions of one wave before the search
+    stops. An exception raised in a worker, or a worker that dies, stops the search with
+    a RuntimeError. Returns the number of explored and frontier states of all the workers."""
+    workers = workers or os.cpu_count() or 1
+    rows, cols = problem.matrix_size
+    tracer = problem.tracer
+
+    def replay(data):
+        # Report the events of a worker to the tracer
+        events = array('l')
+        events.frombytes(data)
+        for i in range(0, len(events), 3):
+            cell, o = divmod(events[i + 1], ORIENTATIONS)
+            state = State(cell // cols, cell % cols, o)
+            if events[i] == EXPANDED:
+                tracer.expanded(state)
+            elif events[i] == GENERATED:
+                tracer.result(state, problem.actions_list[events[i + 2]])
+            else:
+                tracer.blocked(state, problem.actions_list[events[i + 2]])
+
+    def receive():
+        # Next message of the workers, checking that they are still running while waiting
+        while True:
+            try:
+                message = status.get(timeout=LIVENESS_INTERVAL)
+            except Empty:
+                for rank, process in enumerate(processes):
+                    if process.exitcode is not None and process.exitcode != 0:
+                        raise RuntimeError(f"search worker {rank} exited with code {process.exitcode}")
+                continue
+            if message[0] == 'error':
+                raise RuntimeError(f"search worker {message[1]} failed:\n{message[2]}")
+            if message[0] in ('count', 'done') and tracer is not None:
+                replay(message[-1])
+            return message
+
+    blocks = []
+    processes = []
+    try:
+        shm = shared_memory.SharedMemory(create=True, size=max(4 * rows * cols, 1))
+        blocks.append(shm)
+        hardness = shm.buf.cast('i')
+        try:
+            for x in range(rows):
+                hardness[x * cols:(x + 1) * cols] = array('i', problem.map[x])
+        finally:
+            hardness.release()
+        costs_name = None
+        if problem.h_function is h_perfect:
+            costs = shared_block(cost_to_go_table(problem).tobytes())
+            blocks.append(costs)
+            costs_name = costs.name
+
+        context = multiprocessing.get_context()
+        inboxes = [context.Queue() for _ in range(workers)]
+        status = context.Queue()
+        processes = [context.Process(target=search_worker, daemon=True,
+                                     args=(rank, workers, shm.name, costs_name, tuple(problem.matrix_size),
+                                           problem.initial, problem.goal, problem.h_function, problem.map_file,
+                                           inboxes, status, batch_size, tracer is not None))
+                     for rank in range(workers)]
+        for process in processes:
+            process.start()
+        best = (INF, -1)
+        wave, previous = 0, None
+
+        # Run waves of probes until the counters show that the search is over
+        while True:
+            wave += 1
+            for inbox in inboxes:
+                inbox.put(('probe', wave))
+            counts = {}
+            while len(counts) < workers:
+                message = receive()
+                if message[0] == 'goal':
+                    best = min(best, message[1:])
+                elif message[0] == 'count' and message[2] == wave:
+                    counts[message[1]] = message[3:6]
+            counts = [counts[rank] for rank in range(workers)]
+            sent = sum(c[0] for c in counts)
+            received = sum(c[1] for c in counts)
+            if all(c[2] for c in counts) and sent == received:
+                if counts == previous:
+                    break
+                previous = counts
+            else:
+                previous = None
+                time.sleep(WAVE_INTERVAL)
+
+        # Rebuild the path from the parents kept by the owner of each state
+        cost, idx = best
+        chain = []
+        while idx >= 0:
+            inboxes[owner(idx, workers)].put(('path', idx))
+            message = receive()
+            while message[0] != 'path':
+                message = receive()
+            chain.extend(message[1])
+            idx = message[2]
+
+        for inbox in inboxes:
+            inbox.put(('stop',))
+        n_explored = n_frontier = 0
+        for _ in range(workers):
+            message = receive()
+            while message[0] != 'done':
+                message = receive()
+            n_explored += message[2]
+            n_frontier += message[3]
+        for process in processes:
+            process.join()
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for block in blocks:
+            try:
+                block.close()
+            finally:
+                block.unlink()
+
+    stats = {'workers': workers}
+    if cost == INF:
+        return SolveResult((False, Node(problem.initial), ItemCount(n_explored), ItemCount(n_frontier)), stats)
+
+    node = Node(problem.initial)
+    for idx, action in reversed(chain[:-1]):
+        cell, o = divmod(idx, ORIENTATIONS)
+        state = State(cell // cols, cell % cols, o)
+        action = problem.actions_list[action]
+        node = Node(state, node, action, problem.path_cost(node.path_cost, node.state, action, state))
+    return SolveResult((True, node, ItemCount(n_explored), ItemCount(n_frontier)), stats)
@@ -0,0 +1,200 @@
+# Copyright (C) 2024  Jose Ángel Pérez Garrido
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# Long-running query mode: the map is loaded once and every line of input is a JSON query
+#   {"id": 1, "start": [0, 0, 0], "goal": [9, 9, 8], "method": "astar", "heuristic": "h2"}
+# answered with one JSON line. Missing start or goal take the values of the map file.
+
+import json
+import os
+import socketserver
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from .drillrobot import DrillRobot
+from .miningproblem import MiningProblem
+from .state import State
+from .countingsearch import COUNTING_SEARCHES
+
+# Default number of answers kept in memory
+RESULT_CACHE_SIZE = 1024
+
+# Map, methods and heuristics of a worker process, loaded once when it starts
+_agent = None
+_methods = None
+_heuristics = None
+
+def init_worker(map_file, methods, heuristics):
+    global _agent, _methods, _heuristics
+    _agent = DrillRobot(map_file)
+    _methods = methods
+    _heuristics = heuristics
+
+def solve_query(key):
+    """Solves a query in a worker process. Per-map structures (grid graph, cost-to-go
+    tables...) stay cached in the worker between queries."""
+    start, goal, method, heuristic = key
+    problem = MiningProblem(State(*start), _agent.map, _agent.matrix_size,
+                            _heuristics[heuristic] if heuristic else None, State(*goal),
+                            map_file=_agent.map_file)
+    search = COUNTING_SEARCHES.get(_methods[method], _methods[method])
+    is_solved, solution, explored, frontier = search(problem)
+    return {
+        'solved': bool(is_solved),
+        'cost': solution.path_cost,
+        'depth': solution.depth,
+        'path': [step.name for step in solution.solution()],
+        'explored': len(explored),
+        'frontier': len(frontier),
+    }
+
+
+class PathService:
+    """Answers path queries against one map using a pool of worker processes."""
+
+    def __init__(self, map_file, methods, heuristics, informed_methods, processes=None, cache_size=RESULT_CACHE_SIZE):
+        self.agent = DrillRobot(map_file)
+        self.methods = methods
+        self.heuristics = heuristics
+        self.informed_methods = informed_methods
+        self.cache_size = cache_size
+        self.results = OrderedDict()
+        # Queries being solved, so repeated ones wait for the same job
+        self.pending = {}
+        self.lock = threading.RLock()
+        self.executor = ProcessPoolExecutor(max_workers=processes, initializer=init_worker,
+                                            initargs=(map_file, methods, heuristics))
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+    def parse(self, query):
+        # Turn a query into the (start, goal, method, heuristic) key of its answer
+        rows, cols = self.agent.matrix_size
+        start = tuple(query.get('start', (self.agent.state.x, self.agent.state.y, self.agent.state.orientation)))
+        goal = tuple(query.get('goal', (self.agent.goal.x, self.agent.goal.y, self.agent.goal.orientation)))
+        method = query.get('method', 'breadth')
+        heuristic = query.get('heuristic')
+
+        # Floats would pass the range checks and bools are ints, so neither is accepted
+        is_int = lambda v: isinstance(v, int) and not isinstance(v, bool)
+        if len(start) != 3 or not all(map(is_int, start)) or \
+                not (0 <= start[0] < rows and 0 <= start[1] < cols and 0 <= start[2] < 8):
+            raise ValueError(f"Invalid start state: {list(start)}")
+        if len(goal) != 3 or not all(map(is_int, goal)) or \
+                not (0 <= goal[0] < rows and 0 <= goal[1] < cols and 0 <= goal[2] <= 8):
+            raise ValueError(f"Invalid goal state: {list(goal)}")
+        if method not in self.methods:
+            raise ValueError(f"Unknown method: {method}")
+        if method in self.informed_methods:
+            if heuristic not in self.heuristics:
+                raise ValueError(f"Method {method} needs a heuristic, one of: {', '.join(self.heuristics)}")
+        elif heuristic:
+            raise ValueError(f"Method {method} does not need a heuristic function")
+        return start, goal, method, heuristic
+
+    def submit(self, line, reply):
+        """Answers a line of input, calling reply with the answer (maybe from another thread)."""
+        query_id = None
+        def answer(result):
+            reply(dict(result, id=query_id) if query_id is not None else result)
+
+        try:
+            query = json.loads(line)
+            query_id = query.get('id')
+            key = self.parse(query)
+        except (ValueError, TypeError, AttributeError) as e:
+            answer({'error': str(e)})
+            return
+
+        with self.lock:
+            if key in self.results:
+                self.results.move_to_end(key)
+                result = dict(self.results[key], cached=True)
+            else:
+                result = None
+                future = self.pending.get(key)
+                if future is None:
+                    future = self.pending[key] = self.executor.submit(solve_query, key)
+                    future.add_done_callback(lambda f: self.store(key, f))
+
+        if result is not None:
+            answer(result)
+        else:
+            future.add_done_callback(lambda f: answer(self.outcome(f)))
+
+    def outcome(self, future):
+        # Answer of a finished job
+        if future.exception() is not None:
+            return {'error': str(future.exception())}
+        return dict(future.result(), cached=False)
+
+    def store(self, key, future):
+        # Keep the answer of a finished job in the bounded LRU cache
+        with self.lock:
+            del self.pending[key]
+            if future.exception() is None:
+                self.results[key] = future.result()
+                if len(self.results) > self.cache_size:
+                    self.results.popitem(last=False)
+
+    def serve_stream(self, input_stream, output_stream):
+        # Answer every line of the input stream, in completion order
+        write_lock = threading.Lock()
+        done = threading.Condition()
+        remaining = [0]
+
+        def reply(result):
+            with write_lock:
+                output_stream.write(json.dumps(result) + "\n")
+                output_stream.flush()
+            with done:
+                remaining[0] -= 1
+                done.notify_all()
+
+        for line in input_stream:
+            if line.strip():
+                with done:
+                    remaining[0] += 1
+                self.submit(line, reply)
+
+        with done:
+            done.wait_for(lambda: remaining[0] == 0)
+
+    def serve_socket(self, path):
+        # Answer the queries of every client connected to a Unix socket
+        service = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                output = self.wfile
+                class Writer:
+                    def write(self, text):
+                        output.write(text.encode())
+                    def flush(self):
+                        output.flush()
+                service.serve_stream((line.decode() for line in self.rfile), Writer())
+
+        if os.path.exists(path):
+            os.remove(path)
+        with socketserver.ThreadingUnixStreamServer(path, Handler) as server:
+            print(f"Listening on {path}", file=sys.stderr)
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                os.remove(path)
@@ -0,0 +1,132 @@
+# Copyright (C) 2024  Jose Ángel Pérez Garrido
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import cProfile
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+import aima.search as aima_search
+
+# Phases of a search timed by the profiler
+PHASES = ('actions', 'result', 'path_cost', 'goal_test', 'h', 'frontier')
+
+# Methods of the problem timed in each phase
+PROBLEM_PHASES = ('actions', 'result', 'path_cost', 'goal_test', 'h')
+
+# Methods of the aima priority queue timed as frontier operations
+FRONTIER_METHODS = ('append', 'extend', 'pop', '__contains__', '__getitem__', '__delitem__')
+
+
+class Profiler:
+    """Measures where the time of a search goes. The methods of the problem and the
+    aima priority queue are wrapped only during a profiled solve, so problems solved
+    without profiler run the original code. The time of each phase excludes the phases
+    called from it (the heuristic computed when a node is added to the frontier is
+    counted in h, not in frontier).
+    With memory, the peak memory allocated during the search is traced, which slows
+    the search down and inflates the time of every phase, so it is off by default.
+    With prof_file the search also runs under cProfile and its statistics are saved
+    to that file."""
+
+    def __init__(self, memory=False, prof_file=None):
+        self.memory = memory
+        self.prof_file = prof_file
+        self.times = Counter()
+        self.calls = Counter()
+        self.elapsed_time = 0.0
+        self.peak_memory = None
+        # Time spent in the phases called from the phase being timed
+        self._inner = 0.0
+
+    def timed(self, phase, func):
+        # Wrap a function so its calls and exclusive time are added to a phase
+        def wrapper(*args):
+            outer = self._inner
+            self._inner = 0.0
+            start = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                elapsed = time.perf_counter() - start
+                self.times[phase] += elapsed - self._inner
+                self.calls[phase] += 1
+                self._inner = outer + elapsed
+        return wrapper
+
+    def instrument(self, problem):
+        # Time the methods of this problem only, shadowing them with instance attributes
+        for phase in PROBLEM_PHASES:
+            setattr(problem, phase, self.timed(phase, getattr(problem, phase)))
+        return problem
+
+    @contextmanager
+    def running(self):
+        """Profiles the search run inside the block. The aima PriorityQueue class is
+        replaced by a timed subclass while the block runs and restored when it exits,
+        even on errors. As that replacement is global to the process, profiled searches
+        cannot be nested or run in several threads at once."""
+        queue_class = aima_search.PriorityQueue
+        if getattr(queue_class, '_profiled', False):
+            raise RuntimeError("a profiled search is already running")
+        methods = {name: self.timed('frontier', getattr(queue_class, name))
+                   for name in FRONTIER_METHODS if hasattr(queue_class, name)}
+        methods['_profiled'] = True
+
+        profile = cProfile.Profile() if self.prof_file else None
+        start = None
+        try:
+            aima_search.PriorityQueue = type(queue_class.__name__, (queue_class,), methods)
+            if self.memory:
+                tracemalloc.start()
+            if profile is not None:
+                profile.enable()
+            start = time.perf_counter()
+            yield self
+        finally:
+            if start is not None:
+                self.elapsed_time += time.perf_counter() - start
+            if profile is not None:
+                profile.disable()
+                profile.dump_stats(self.prof_file)
+            if self.memory and tracemalloc.is_tracing():
+                self.peak_memory = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            aima_search.PriorityQueue = queue_class
+
+    def stats(self):
+        """Time and calls of each phase, with the time of the rest of the search
+        in other. The expansions per second are None for the searches that do not
+        ask the problem for its actions (the ones over the integer state encoding)."""
+        phases = {phase: {'calls': self.calls[phase], 'time': self.times[phase]} for phase in PHASES}
+        other = self.elapsed_time - sum(self.times.values())
+        phases['other'] = {'calls': 0, 'time': max(other, 0.0)}
+        expansions = self.calls['actions']
+        return {
+            'phases': phases,
+            'search_time': self.elapsed_time,
+            'peak_memory': self.peak_memory,
+            'expansions_per_second': expansions / self.elapsed_time if expansions and self.elapsed_time else None,
+        }
+
+
+def format_phases(stats):
+    # Lines of a table with the calls and time of each phase
+    total = stats['search_time'] or 1.0
+    lines = [f"{'phase':<10} {'calls':>10} {'time (s)':>10} {'share':>7}"]
+    for phase, values in stats['phases'].items():
+        lines.append(f"{phase:<10} {values['calls']:>10} {values['time']:>10.4f} "
+                     f"{100 * values['time'] / total:>6.1f}%")
+    return lines
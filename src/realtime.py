@@ -0,0 +1,170 @@
+# Copyright (C) 2024  Jose Ángel Pérez Garrido
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# Real-time search (LSS-LRTA*). Each decision step runs A* from the current state of the
+# robot for at most a fixed number of expansions, raises the heuristic of the expanded
+# states to what the search learned, and moves the robot to the most promising state of
+# the frontier. The learned values are kept for the next steps and trials.
+
+import heapq
+import math
+import time
+from aima.search import Node
+from .gridsearch import grid_graph, backward_costs
+from .shared import SolveResult, ItemCount
+
+# Default number of expansions of a decision step
+LOOKAHEAD = 32
+
+
+def percentile(values, p):
+    # Value below which p percent of the sorted values fall (nearest rank)
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))]
+
+
+class RealTimePlanner:
+    """Plans with a bounded amount of work per decision. learned maps the states whose
+    heuristic was raised to their new value, and can be given to start from the values
+    learned by another planner on the same map and goal."""
+
+    def __init__(self, problem, lookahead=LOOKAHEAD, learned=None):
+        self.problem = problem
+        self.lookahead = lookahead
+        self.learned = learned if learned is not None else {}
+        self.expansions = 0
+
+    def h(self, state):
+        value = self.learned.get(state)
+        if value is None:
+            value = self.problem.h(Node(state)) or 0
+        return value
+
+    def step(self, state):
+        """Runs one decision step from a state. Returns the (action, state, cost) moves
+        to the chosen state and the number of states left in the frontier."""
+        problem = self.problem
+        g = {state: 0}
+        parent = {state: None}
+        # Expanded states and, for each reached state, the expanded states leading to it
+        expanded = set()
+        predecessors = {}
+        frontier = [(self.h(state), 0, 0, state)]
+        counter = 1
+        target = None
+
+        while frontier and len(expanded) < self.lookahead:
+            _, _, cost, current = heapq.heappop(frontier)
+            if cost != g[current] or current in expanded:
+                continue
+            if problem.goal_test(current):
+                target = current
+                break
+            expanded.add(current)
+            for action in problem.actions(current):
+                succ = problem.result(current, action)
+                new_cost = problem.path_cost(cost, current, action, succ)
+                predecessors.setdefault(succ, []).append((current, new_cost - cost))
+                if succ not in g or new_cost < g[succ]:
+                    g[succ] = new_cost
+                    parent[succ] = (current, action, new_cost - cost)
+                    heapq.heappush(frontier, (new_cost + self.h(succ), counter, new_cost, succ))
+                    counter += 1
+        self.expansions += len(expanded)
+
+        open_states = {s for _, _, cost, s in frontier if cost == g[s] and s not in expanded}
+        if target is None:
+            target = min(open_states, key=lambda s: (g[s] + self.h(s), g[s]), default=None)
+            if target is None:
+                return [], 0
+        open_states.add(target)
+
+        self.learn(expanded, open_states, predecessors)
+
+        moves = []
+        while parent[target] is not None:
+            previous, action, step_cost = parent[target]
+            moves.append((action, target, step_cost))
+            target = previous
+        moves.reverse()
+        return moves, len(open_states)
+
+    def learn(self, expanded, open_states, predecessors):
+        # Dijkstra from the frontier over the reversed edges: each expanded state gets the
+        # lowest cost of reaching a frontier state plus the heuristic of that state
+        for state in expanded:
+            self.learned[state] = math.inf
+        heap = [(self.h(s), i, s) for i, s in enumerate(open_states)]
+        heapq.heapify(heap)
+        counter = len(heap)
+        while heap:
+            value, _, state = heapq.heappop(heap)
+            if value > self.h(state):
+                continue
+            for previous, step_cost in predecessors.get(state, ()):
+                if previous in expanded and value + step_cost < self.learned[previous]:
+                    self.learned[previous] = value + step_cost
+                    heapq.heappush(heap, (value + step_cost, counter, previous))
+                    counter += 1
+
+    def trial(self, max_steps=None):
+        """Moves the robot from the initial state until it reaches the goal, planning
+        each move with step. Returns the solution node, the time of each step and
+        the size of the last frontier."""
+        node = Node(self.problem.initial)
+        latencies, n_frontier = [], 0
+        while not self.problem.goal_test(node.state):
+            if max_steps is not None and len(latencies) >= max_steps:
+                break
+            start_time = time.perf_counter()
+            moves, n_frontier = self.step(node.state)
+            latencies.append(time.perf_counter() - start_time)
+            if not moves:
+                break
+            for action, state, step_cost in moves:
+                node = Node(state, node, action, node.path_cost + step_cost)
+        return node, latencies, n_frontier
+
+
+def optimal_cost(problem):
+    # Exact cost from the initial state to the goal cell
+    graph = grid_graph(problem)
+    costs = backward_costs(graph, problem.goal.x, problem.goal.y)
+    return costs[graph.index(problem.initial.x, problem.initial.y, problem.initial.orientation)]
+
+
+def lrta_star_search(problem, lookahead=LOOKAHEAD, trials=1, learned=None):
+    """Real-time search expanding at most lookahead nodes before each move. The trials
+    run one after the other from the initial state, sharing the learned heuristic, and
+    the solution of the last one is returned. The stats have the cost of every trial,
+    the optimal cost and the percentiles of the time of a decision step."""
+    planner = RealTimePlanner(problem, lookahead, learned)
+    costs, latencies = [], []
+    for _ in range(trials):
+        node, trial_latencies, n_frontier = planner.trial()
+        costs.append(node.path_cost)
+        latencies.extend(trial_latencies)
+
+    stats = {
+        'trial_costs': costs,
+        'optimal_cost': optimal_cost(problem),
+        'steps': len(latencies),
+        'latency': {f'p{p}': percentile(latencies, p) for p in (50, 90, 99, 100)},
+        'learned_states': len(planner.learned),
+    }
+    is_solved = problem.goal_test(node.state)
+    return SolveResult((is_solved, node, ItemCount(planner.expansions), ItemCount(n_frontier)), stats)
@@ -15,6 +15,11 @@
 
 import sys
 import os
+import hashlib
+from collections import OrderedDict
+
+# Maximum number of map digests kept in memory
+DIGEST_CACHE_SIZE = 16
 
 def make_dirs(path):
     # Create directory at given path 
@@ -28,3 +33,52 @@ def blockPrint():
 def enablePrint():
     # Enable print
     sys.stdout = sys.__stdout__
+
+def map_hash(matrix):
+    # Hash of the content of a map
+    digest = hashlib.blake2b(digest_size=16)
+    for row in matrix:
+        digest.update(" ".join(map(str, row)).encode())
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+_digest_cache = OrderedDict()
+
+def map_digest(matrix):
+    """Returns map_hash(matrix), hashing the map only the first time the map object is seen.
+    forget_digest has to be called when the content of the map changes."""
+    entry = _digest_cache.get(id(matrix))
+    # Keep a reference to the map so its id cannot be reused while cached
+    if entry is not None and entry[0] is matrix:
+        _digest_cache.move_to_end(id(matrix))
+        return entry[1]
+
+    digest = map_hash(matrix)
+    _digest_cache[id(matrix)] = (matrix, digest)
+    if len(_digest_cache) > DIGEST_CACHE_SIZE:
+        _digest_cache.popitem(last=False)
+    return digest
+
+def forget_digest(matrix):
+    # Drop the cached digest of a map whose content has changed
+    entry = _digest_cache.get(id(matrix))
+    if entry is not None and entry[0] is matrix:
+        del _digest_cache[id(matrix)]
+
+class SolveResult(tuple):
+    """The (is_solved, solution, explored, frontier) tuple returned by the search
+    algorithms, with the statistics collected while solving in stats."""
+
+    def __new__(cls, result, stats=None):
+        self = super().__new__(cls, result)
+        self.stats = stats if stats is not None else {}
+        return self
+
+class ItemCount:
+    """Stands for a list or set of which only the number of items is kept."""
+
+    def __init__(self, count=0):
+        self.count = count
+
+    def __len__(self):
+        return self.count
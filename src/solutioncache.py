@@ -0,0 +1,111 @@
+# Copyright (C) 2024  Jose Ángel Pérez Garrido
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import json
+import os
+import sqlite3
+import time
+from aima.search import Node
+from .shared import SolveResult, ItemCount, map_digest
+
+# Default file of the cache
+CACHE_FILE_NAME = '.solutions.sqlite'
+
+# Default maximum number of solutions kept in the file
+CACHE_SIZE = 10000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS solutions (
+    key TEXT PRIMARY KEY,
+    map_file TEXT NOT NULL,
+    map_hash TEXT NOT NULL,
+    solved INTEGER NOT NULL,
+    actions TEXT NOT NULL,
+    cost INTEGER NOT NULL,
+    depth INTEGER NOT NULL,
+    explored INTEGER NOT NULL,
+    frontier INTEGER NOT NULL,
+    stats TEXT NOT NULL,
+    used INTEGER NOT NULL
+)
+"""
+
+
+class SolutionCache:
+    """Solutions of previous runs kept in a SQLite file. A solution is found by the content
+    hash of the map, the start, the goal, the method, the heuristic and the options of the
+    method, so it is not used anymore once the map changes. Storing a solution of a map
+    file deletes the ones of older contents of that file, and the least recently used
+    solutions are deleted when there are more than max_entries."""
+
+    def __init__(self, filename=CACHE_FILE_NAME, max_entries=CACHE_SIZE):
+        self.max_entries = max_entries
+        self.db = sqlite3.connect(filename)
+        with self.db:
+            self.db.execute(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def key(self, agent, digest, method, heuristic, options):
+        return json.dumps([digest, list(agent.state), list(agent.goal), method, heuristic, sorted(options.items())])
+
+    def get(self, agent, method, heuristic=None, options=None):
+        """Returns the cached result of solving the map of the agent, as DrillRobot.solve
+        with stats_only would, or None if it is not in the cache."""
+        options = options or {}
+        digest = map_digest(agent.map)
+        key = self.key(agent, digest, method, heuristic, options)
+        row = self.db.execute("SELECT solved, actions, cost, depth, explored, frontier, stats "
+                              "FROM solutions WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        solved, actions, cost, depth, n_explored, n_frontier, stats = row
+
+        # Replay the actions to rebuild the solution nodes
+        problem = agent.formulate_problem(None)
+        by_name = {action.name: action for action in problem.actions_list}
+        node = Node(problem.initial)
+        for name in json.loads(actions):
+            action = by_name[name]
+            state = problem.result(node.state, action)
+            node = Node(state, node, action, problem.path_cost(node.path_cost, node.state, action, state))
+        if node.path_cost != cost or node.depth != depth:
+            # Not the same map after all
+            with self.db:
+                self.db.execute("DELETE FROM solutions WHERE key = ?", (key,))
+            return None
+
+        with self.db:
+            self.db.execute("UPDATE solutions SET used = ? WHERE key = ?", (time.time_ns(), key))
+        agent.seq = SolveResult((bool(solved), node, ItemCount(n_explored), ItemCount(n_frontier)), json.loads(stats))
+        return agent.seq
+
+    def put(self, agent, method, heuristic, options, result):
+        # Store the result of a search, replacing the solutions of older contents of the map file
+        digest = map_digest(agent.map)
+        is_solved, solution, explored, frontier = result
+        map_file = os.path.abspath(agent.map_file)
+        actions = json.dumps([action.name for action in solution.solution()])
+        with self.db:
+            self.db.execute("DELETE FROM solutions WHERE map_file = ? AND map_hash != ?", (map_file, digest))
+            self.db.execute("INSERT OR REPLACE INTO solutions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                            (self.key(agent, digest, method, heuristic, options), map_file, digest,
+                             int(bool(is_solved)), actions, solution.path_cost, solution.depth,
+                             len(explored), len(frontier), json.dumps(result.stats), time.time_ns()))
+            excess = self.db.execute("SELECT COUNT(*) FROM solutions").fetchone()[0] - self.max_entries
+            if excess > 0:
+                self.db.execute("DELETE FROM solutions WHERE key IN "
+                                "(SELECT key FROM solutions ORDER BY used LIMIT ?)", (excess,))
@@ -13,8 +13,15 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-class State:
-            
+from operator import itemgetter
+
+class State(tuple):
+    """Position and orientation of the robot, stored as the immutable tuple
+    (x, y, orientation). Hashing, equality and ordering are those of the
+    tuple, so they use the whole key and run without any Python code."""
+
+    __slots__ = ()
+
     # Correspondence between numbers and names of the orientations
     ORIENTATION_NAMES = {0:"North", 1:"Northeast", 2:"East", 3:"Southeast", 4:"South", 
                          5:"Southwest", 6:"West", 7:"Northwest", 8:"Any"}
@@ -24,25 +31,27 @@ class State:
                         6:(0,-1), 7:(-1,-1), 8:(0,0)}
 
 
-    def __init__(self, x: int, y: int, o: int):
-        self.position = (x, y)
-        self.orientation = o
+    def __new__(cls, x: int, y: int, o: int):
+        return tuple.__new__(cls, (x, y, o))
 
+    def __getnewargs__(self):
+        # Arguments of __new__ used when a state is copied or unpickled
+        return tuple(self)
 
-    @property
-    def x(self):
-        # The row number of the state
-        return self.position[0]
+    # The row number, column number and orientation of the state
+    x = property(itemgetter(0))
+    y = property(itemgetter(1))
+    orientation = property(itemgetter(2))
 
     @property
-    def y(self):
-        # The column number of the state
-        return self.position[1]
+    def position(self):
+        # The row and column numbers of the state
+        return (self[0], self[1])
 
     @property
     def movement(self):
         # The movement to be performed according to the orientation of the state
-        return self.ORIENTATION_TRAD[self.orientation]
+        return self.ORIENTATION_TRAD[self[2]]
 
     @property
     def state(self):
@@ -57,19 +66,5 @@ class State:
 
     def __str__(self):
         # String of the state in proper format
-        orient = State.ORIENTATION_NAMES[self.orientation]
-        return str.format("({},{},{})", self.position[0], self.position[1], orient)
-
-    def __eq__(self, new_value):
-        # If the state is equal to another given state
-        return self.position[0] == new_value.position[0] and \
-            self.position[1] == new_value.position[1] and \
-            self.orientation == new_value.orientation
-    
-    def __lt__(self, new_value):
-        # If the state is less than another given state
-        return 0
-    
-    def __hash__(self):
-        # Calculate hash based on state position
-        return hash(self.position)
\ No newline at end of file
+        orient = State.ORIENTATION_NAMES[self[2]]
+        return str.format("({},{},{})", self[0], self[1], orient)
@@ -0,0 +1,162 @@
+# Copyright (C) 2024  Jose Ángel Pérez Garrido
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# Tours visiting several target cells. The drilling cost between every pair of targets
+# comes from one Dijkstra per target over the reversed actions, the order of the visits
+# from nearest neighbour improved with 2-opt, and the path from one search per leg.
+
+import math
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from aima.search import Node
+from .filereader import FileReader
+from .gridsearch import GridGraph, grid_graph, backward_costs, ORIENTATIONS
+from .miningproblem import MiningProblem
+from .shared import SolveResult, ItemCount, map_digest
+from .state import State
+
+# Maximum number of cost matrices kept in memory
+MATRIX_CACHE_SIZE = 8
+
+# Graph of the map of a worker process, built once when it starts
+_graph = None
+
+def init_worker(map, matrix_size, map_file=None):
+    # Binary maps are memory-mapped views, which cannot be pickled, so they are read again
+    global _graph
+    if map is None:
+        map = FileReader(map_file).matrix
+    _graph = GridGraph(map, matrix_size)
+
+
+def target_costs(target, sources, graph=None):
+    """Cost of reaching the target cell from each source, a tuple of state indexes
+    whose cheapest one is taken."""
+    costs = backward_costs(graph or _graph, *target)
+    return [min((costs[idx] for idx in states if costs[idx] >= 0), default=math.inf)
+            for states in sources]
+
+
+_matrix_cache = OrderedDict()
+
+def cost_matrix(problem, targets, processes=None):
+    """Returns matrix[i][j], the cost of reaching target j from the initial state (i = 0)
+    or from target i - 1 in its cheapest orientation. The Dijkstra of each target runs in
+    a worker process, and the matrix is kept for the map content, start and targets."""
+    cols = problem.matrix_size[1]
+    start = (problem.initial.x * cols + problem.initial.y) * ORIENTATIONS + problem.initial.orientation
+    key = (map_digest(problem.map), tuple(problem.matrix_size), start, tuple(targets))
+    if key in _matrix_cache:
+        _matrix_cache.move_to_end(key)
+        return _matrix_cache[key]
+
+    sources = [(start,)] + [tuple(range((x * cols + y) * ORIENTATIONS, (x * cols + y + 1) * ORIENTATIONS))
+                            for x, y in targets]
+    if processes == 1 or len(targets) == 1:
+        graph = grid_graph(problem)
+        columns = [target_costs(target, sources, graph) for target in targets]
+    else:
+        if isinstance(problem.map, list):
+            initargs = (problem.map, problem.matrix_size)
+        else:
+            initargs = (None, problem.matrix_size, problem.map_file)
+        with ProcessPoolExecutor(max_workers=processes, initializer=init_worker, initargs=initargs) as executor:
+            columns = list(executor.map(target_costs, targets, [sources] * len(targets)))
+
+    matrix = [list(row) for row in zip(*columns)]
+    _matrix_cache[key] = matrix
+    if len(_matrix_cache) > MATRIX_CACHE_SIZE:
+        _matrix_cache.popitem(last=False)
+    return matrix
+
+
+def tour_cost(matrix, order):
+    # Cost of visiting the targets in order, starting from the initial state
+    cost, row = 0, 0
+    for target in order:
+        cost += matrix[row][target]
+        row = target + 1
+    return cost
+
+
+def nearest_neighbour(matrix):
+    # Visit the cheapest target not visited yet from the last one
+    order, row = [], 0
+    left = set(range(len(matrix[0])))
+    while left:
+        target = min(left, key=lambda j: (matrix[row][j], j))
+        order.append(target)
+        left.remove(target)
+        row = target + 1
+    return order
+
+
+def two_opt(matrix, order):
+    """Reverses segments of the order while that lowers the cost of the tour. The tour
+    does not go back to the start, so the last segment can be reversed too."""
+    best = tour_cost(matrix, order)
+    improved = True
+    while improved:
+        improved = False
+        for i in range(len(order) - 1):
+            for j in range(i + 1, len(order)):
+                candidate = order[:i] + order[i:j + 1][::-1] + order[j + 1:]
+                cost = tour_cost(matrix, candidate)
+                if cost < best:
+                    order, best = candidate, cost
+                    improved = True
+    return order
+
+
+def plan_tour(problem, targets, search_algorithm, processes=None, prepare=None):
+    """Finds a tour from the initial state of the problem through every target cell
+    (row, col). Each leg is solved with search_algorithm from the state the previous leg
+    ended in, with the heuristic, tracer and actions of the problem, and the legs are
+    joined into one solution Node. prepare(leg), if given, returns the problem searched
+    for a leg (as Profiler.instrument does). Returns the number of explored and frontier
+    items of all the legs, with the order of the targets and the cost of each leg in stats."""
+    targets = [tuple(target) for target in targets]
+    matrix = cost_matrix(problem, targets, processes)
+    greedy = nearest_neighbour(matrix)
+    order = two_opt(matrix, greedy)
+
+    node = Node(problem.initial)
+    is_solved, n_explored, n_frontier, leg_costs = True, 0, 0, []
+    for target in order:
+        x, y = targets[target]
+        # Any orientation in the target cell, as in the maps of FileWriter
+        leg = MiningProblem(node.state, problem.map, problem.matrix_size, problem.h_function,
+                            State(x, y, ORIENTATIONS), problem.tracer, problem.map_file, problem.macro_actions)
+        # The joined path uses the actions of the tour problem
+        leg.actions_list = problem.actions_list
+        if prepare is not None:
+            leg = prepare(leg)
+        solved, solution, explored, frontier = search_algorithm(leg)
+        n_explored += len(explored)
+        n_frontier += len(frontier)
+        if not solved:
+            is_solved = False
+            break
+        for step in solution.path()[1:]:
+            node = Node(step.state, node, step.action, node.path_cost + step.path_cost - step.parent.path_cost)
+        leg_costs.append(solution.path_cost)
+
+    stats = {
+        'order': [targets[target] for target in order],
+        'leg_costs': leg_costs,
+        'estimated_cost': tour_cost(matrix, order),
+        'nearest_neighbour_cost': tour_cost(matrix, greedy),
+    }
+    return SolveResult((is_solved, node, ItemCount(n_explored), ItemCount(n_frontier)), stats)
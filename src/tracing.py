@@ -0,0 +1,108 @@
+# Copyright (C) 2024  Jose Ángel Pérez Garrido
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+import sys
+import time
+from collections import Counter
+
+# Trace levels
+OFF, INFO, DEBUG = 0, 1, 2
+
+LEVELS = {'off': OFF, 'info': INFO, 'debug': DEBUG}
+
+
+class Tracer:
+    """Collects what happens inside a MiningProblem during a search.
+    A problem without tracer (the default) skips all of this with a single check."""
+
+    def __init__(self, level=OFF, counters=False, stream=None):
+        self.level = level
+        self.counters = counters
+        self.stream = stream
+        self.expansions = 0
+        self.action_counts = Counter()
+        self.blocked_counts = Counter()
+        self.start_time = None
+        self.elapsed_time = 0.0
+
+    def emit(self, level, event, **fields):
+        # Write an event as a line of key=value fields
+        if level <= self.level:
+            stream = self.stream or sys.stdout
+            values = " ".join(f"{key}={value}" for key, value in fields.items())
+            stream.write(f"{event} {values}\n")
+
+    def start(self, problem):
+        self.start_time = time.perf_counter()
+        self.emit(INFO, "start", initial=problem.initial, goal=problem.goal)
+
+    def stop(self):
+        self.elapsed_time += time.perf_counter() - self.start_time
+        self.emit(INFO, "stop", **self.stats())
+
+    def expanded(self, state):
+        # A node is being expanded (its actions were asked for)
+        if self.counters:
+            self.expansions += 1
+
+    def blocked(self, state, action):
+        # An action could not be applied in the state
+        if self.counters:
+            self.blocked_counts[action.name] += 1
+        if self.level >= DEBUG:
+            self.emit(DEBUG, "blocked", state=state, action=action.name)
+
+    def result(self, state, action):
+        # A successor is generated by applying the action in the state
+        if self.counters:
+            self.action_counts[action.name] += 1
+        if self.level >= DEBUG:
+            self.emit(DEBUG, "result", state=state, action=action.name)
+
+    def stats(self):
+        """Counters collected so far."""
+        if not self.counters:
+            return {'time': self.elapsed_time}
+        return {
+            'time': self.elapsed_time,
+            'expansions': self.expansions,
+            'actions': dict(self.action_counts),
+            'blocked': dict(self.blocked_counts),
+            'nodes_per_second': self.expansions / self.elapsed_time if self.elapsed_time else 0.0,
+        }
+
+
+class BudgetExceeded(Exception):
+    """Raised inside a search that went over its node or time budget."""
+
+
+class BudgetTracer(Tracer):
+    """Tracer that stops the search it is given to by raising BudgetExceeded once more
+    than max_nodes nodes are expanded or max_time seconds have passed (None for no limit).
+    The budget is checked at every expansion."""
+
+    def __init__(self, max_nodes=None, max_time=None, level=OFF, counters=False, stream=None):
+        super().__init__(level, counters, stream)
+        self.max_nodes = max_nodes
+        self.max_time = max_time
+        self.nodes = 0
+
+    def expanded(self, state):
+        super().expanded(state)
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise BudgetExceeded(f"more than {self.max_nodes} nodes expanded")
+        if self.max_time is not None and time.perf_counter() - self.start_time > self.max_time:
+            raise BudgetExceeded(f"more than {self.max_time} seconds spent")
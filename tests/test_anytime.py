@@ -0,0 +1,67 @@
+# Copyright (C) 2024  Jose Ángel Pérez Garrido
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# Run from the repository root:
+#   python -m unittest tests.test_anytime
+
+import random
+import unittest
+from src.anytime import anytime_search
+from src.bucketsearch import uniform_cost_search
+from src.heuristic_functions import h4, h_perfect
+from src.miningproblem import MiningProblem
+from src.state import State
+
+
+def random_problem(seed, h_function, max_size=12):
+    # Random map of 3x3 to max_size x max_size cells from the top left corner to the bottom right one
+    rng = random.Random(seed)
+    rows, cols = rng.randint(3, max_size), rng.randint(3, max_size)
+    matrix = [[rng.randint(1, 9) for _ in range(cols)] for _ in range(rows)]
+    return MiningProblem(State(0, 0, seed % 8), matrix, (rows, cols), h_function, State(rows - 1, cols - 1, 8))
+
+
+class AnytimeSearchTest(unittest.TestCase):
+
+    def test_without_deadline_ends_with_the_optimal_cost(self):
+        for seed in range(30):
+            optimal = uniform_cost_search(random_problem(seed, None))[1].path_cost
+            for h_function in (h4, h_perfect):
+                found = []
+                result = anytime_search(random_problem(seed, h_function),
+                                        on_solution=lambda solution, bound: found.append((solution.path_cost, bound)))
+                self.assertTrue(result[0], seed)
+                self.assertEqual(result[1].path_cost, optimal, (seed, h_function.__name__))
+                self.assertEqual(result.stats['bound'], 1.0)
+
+                # Every solution is cheaper than the previous one and within its bound of the optimal cost
+                costs = [entry['cost'] for entry in result.stats['solutions']]
+                self.assertEqual(costs, sorted(costs, reverse=True))
+                self.assertEqual(len(set(costs)), len(costs))
+                self.assertEqual(found, [(entry['cost'], entry['bound']) for entry in result.stats['solutions']])
+                for entry in result.stats['solutions']:
+                    self.assertLessEqual(entry['cost'], entry['bound'] * optimal + 1e-9)
+
+    def test_deadline_returns_a_bounded_solution(self):
+        for seed in range(5):
+            optimal = uniform_cost_search(random_problem(seed, None, 40))[1].path_cost
+            result = anytime_search(random_problem(seed, h4, 40), deadline=0)
+            self.assertTrue(result[0], seed)
+            self.assertGreaterEqual(result[1].path_cost, optimal)
+            self.assertLessEqual(result[1].path_cost, result.stats['bound'] * optimal + 1e-9)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+# Copyright (C) 2024  Jose Ángel Pérez Garrido
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# Run from the repository root:
+#   python -m unittest tests.test_bidirectional
+
+import random
+import unittest
+from src.bidirectional import bidirectional_astar_search, bidirectional_uniform_cost_search
+from src.bucketsearch import uniform_cost_search
+from src.heuristic_functions import h4, h_perfect
+from src.miningproblem import MiningProblem
+from src.state import State
+
+
+def small_problem(seed, h_function, initial=None):
+    # Random map of 3x3 to 10x10 cells to the bottom right corner, from the top left one by default
+    rng = random.Random(seed)
+    rows, cols = rng.randint(3, 10), rng.randint(3, 10)
+    matrix = [[rng.randint(1, 9) for _ in range(cols)] for _ in range(rows)]
+    return MiningProblem(initial or State(0, 0, seed % 8), matrix, (rows, cols), h_function,
+                         State(rows - 1, cols - 1, 8))
+
+
+class BidirectionalSearchTest(unittest.TestCase):
+
+    def assertReplays(self, problem, solution):
+        # Applying the actions of the solution from the initial state reaches the goal with its cost
+        state, cost = problem.initial, 0
+        for node in solution.path()[1:]:
+            self.assertIn(node.action.name, [action.name for action in problem.actions(state)])
+            new_state = problem.result(state, node.action)
+            cost = problem.path_cost(cost, state, node.action, new_state)
+            state = new_state
+            self.assertEqual(state, node.state)
+        self.assertTrue(problem.goal_test(state))
+        self.assertEqual(cost, solution.path_cost)
+
+    def test_same_cost_as_uniform_cost_search(self):
+        for seed in range(40):
+            optimal = uniform_cost_search(small_problem(seed, None))[1].path_cost
+            searches = [(bidirectional_uniform_cost_search, None),
+                        (bidirectional_astar_search, h4), (bidirectional_astar_search, h_perfect)]
+            for search, h_function in searches:
+                problem = small_problem(seed, h_function)
+                is_solved, solution, _, _ = search(problem)
+                self.assertTrue(is_solved, (seed, search.__name__))
+                self.assertEqual(solution.path_cost, optimal, (seed, search.__name__))
+                # The second half of the path is rebuilt from the backward side
+                self.assertReplays(problem, solution)
+
+    def test_start_in_the_goal_cell(self):
+        problem = small_problem(2, None)
+        rows, cols = problem.matrix_size
+        problem = small_problem(2, None, State(rows - 1, cols - 1, 3))
+        is_solved, solution, _, _ = bidirectional_uniform_cost_search(problem)
+        self.assertTrue(is_solved)
+        self.assertEqual(solution.path_cost, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+# Copyright (C) 2024  Jose Ángel Pérez Garrido
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# Run from the repository root:
+#   python -m unittest tests.test_bucketsearch
+
+import random
+import unittest
+from aima.search import Node, astar_search
+from src.bucketsearch import BucketQueue, bucket_astar_search, uniform_cost_search
+from src.heuristic_functions import h4, h_perfect
+from src.miningproblem import MiningProblem
+from src.state import State
+
+
+def small_problem(seed, h_function):
+    # Random map of 3x3 to 10x10 cells from the top left corner to the bottom right one
+    rng = random.Random(seed)
+    rows, cols = rng.randint(3, 10), rng.randint(3, 10)
+    matrix = [[rng.randint(1, 9) for _ in range(cols)] for _ in range(rows)]
+    return MiningProblem(State(0, 0, seed % 8), matrix, (rows, cols), h_function, State(rows - 1, cols - 1, 8))
+
+
+class BucketQueueTest(unittest.TestCase):
+
+    def test_pops_in_key_order_after_decreases(self):
+        rng = random.Random(0)
+        queue, keys = BucketQueue(), {}
+        for _ in range(500):
+            state = rng.randrange(100)
+            key = rng.randrange(50)
+            # Like the search, a state is only pushed again with a lower key
+            if state not in keys or key < keys[state]:
+                queue.push(Node(state), key)
+                keys[state] = key
+            if rng.random() < 0.3 and len(queue):
+                key, node = queue.pop()
+                self.assertEqual(key, min(keys.values()))
+                self.assertEqual(key, keys.pop(node.state))
+        self.assertEqual(len(queue), len(keys))
+        popped = [queue.pop()[0] for _ in range(len(keys))]
+        self.assertEqual(popped, sorted(keys.values()))
+        self.assertRaises(IndexError, queue.pop)
+
+    def test_same_key_pops_first_in_first_out(self):
+        queue = BucketQueue()
+        for state in range(5):
+            queue.push(Node(state), 3)
+        self.assertEqual([queue.pop()[1].state for _ in range(5)], list(range(5)))
+
+
+class BucketSearchTest(unittest.TestCase):
+
+    def test_same_cost_as_astar_search(self):
+        for seed in range(30):
+            problem = small_problem(seed, None)
+            optimal = astar_search(problem, lambda node: 0)[1].path_cost
+            self.assertEqual(uniform_cost_search(small_problem(seed, None))[1].path_cost, optimal, seed)
+            for h_function in (h4, h_perfect):
+                is_solved, solution, _, _ = bucket_astar_search(small_problem(seed, h_function))
+                self.assertTrue(is_solved, seed)
+                self.assertEqual(solution.path_cost, optimal, (seed, h_function.__name__))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+# Copyright (C) 2024  Jose Ángel Pérez Garrido
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# Run from the repository root:
+#   python -m unittest tests.test_countingsearch
+
+import random
+import unittest
+from aima.search import breadth_first_graph_search_full
+from src.countingsearch import breadth_first_counting_search, depth_first_counting_search
+from src.miningproblem import MiningProblem
+from src.state import State
+
+
+def small_problem(seed):
+    # Random map of 3x3 to 8x8 cells from the top left corner to the bottom right one
+    rng = random.Random(seed)
+    rows, cols = rng.randint(3, 8), rng.randint(3, 8)
+    matrix = [[rng.randint(1, 9) for _ in range(cols)] for _ in range(rows)]
+    return MiningProblem(State(0, 0, seed % 8), matrix, (rows, cols), None, State(rows - 1, cols - 1, 8))
+
+
+class CountingSearchTest(unittest.TestCase):
+
+    def assertReplays(self, problem, solution):
+        # Applying the actions of the solution from the initial state reaches the goal with its cost
+        state, cost = problem.initial, 0
+        for node in solution.path()[1:]:
+            self.assertIn(node.action.name, [action.name for action in problem.actions(state)])
+            new_state = problem.result(state, node.action)
+            cost = problem.path_cost(cost, state, node.action, new_state)
+            state = new_state
+            self.assertEqual(state, node.state)
+        self.assertTrue(problem.goal_test(state))
+        self.assertEqual(cost, solution.path_cost)
+
+    def test_breadth_first_finds_the_fewest_actions(self):
+        for seed in range(30):
+            problem = small_problem(seed)
+            result = breadth_first_counting_search(problem)
+            self.assertTrue(result[0], seed)
+            self.assertReplays(problem, result[1])
+            self.assertEqual(result[1].depth, breadth_first_graph_search_full(small_problem(seed))[1].depth, seed)
+            self.assertGreaterEqual(result.stats['peak_frontier'], len(result[3]))
+            self.assertEqual(result.stats['peak_explored'], len(result[2]))
+
+    def test_depth_first_paths_reach_the_goal(self):
+        for seed in range(30):
+            problem = small_problem(seed)
+            result = depth_first_counting_search(problem)
+            self.assertTrue(result[0], seed)
+            self.assertReplays(problem, result[1])
+            # Every state is expanded at most once
+            rows, cols = problem.matrix_size
+            self.assertLessEqual(len(result[2]), rows * cols * 8)
+            self.assertGreaterEqual(result.stats['peak_frontier'], len(result[3]))
+
+
+if __name__ == '__main__':
+    unittest.main()
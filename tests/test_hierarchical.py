@@ -0,0 +1,79 @@
+# Copyright (C) 2024  Jose Ángel Pérez Garrido
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# Run from the repository root:
+#   python -m unittest tests.test_hierarchical
+
+import os
+import random
+import tempfile
+import unittest
+from src.bucketsearch import uniform_cost_search
+from src.hierarchical import hierarchical_search, CLUSTER_SIZE
+from src.miningproblem import MiningProblem
+from src.state import State
+
+
+def random_problem(seed, map_file):
+    # Random map spanning several clusters, from the top left corner to the bottom right one
+    rng = random.Random(seed)
+    rows, cols = rng.randint(3, 2 * CLUSTER_SIZE + 5), rng.randint(3, 2 * CLUSTER_SIZE + 5)
+    matrix = [[rng.randint(1, 9) for _ in range(cols)] for _ in range(rows)]
+    return MiningProblem(State(0, 0, seed % 8), matrix, (rows, cols), None, State(rows - 1, cols - 1, 8),
+                         map_file=map_file)
+
+
+class HierarchicalSearchTest(unittest.TestCase):
+
+    def setUp(self):
+        # The abstractions are saved next to the map file
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+
+    def assertReplays(self, problem, solution):
+        # Applying the actions of the solution from the initial state reaches the goal with its cost
+        state, cost = problem.initial, 0
+        for node in solution.path()[1:]:
+            self.assertIn(node.action.name, [action.name for action in problem.actions(state)])
+            new_state = problem.result(state, node.action)
+            cost = problem.path_cost(cost, state, node.action, new_state)
+            state = new_state
+            self.assertEqual(state, node.state)
+        self.assertTrue(problem.goal_test(state))
+        self.assertEqual(cost, solution.path_cost)
+
+    def test_paths_reach_the_goal(self):
+        for seed in range(15):
+            map_file = os.path.join(self.folder.name, f"{seed}.txt")
+            problem = random_problem(seed, map_file)
+            is_solved, solution, explored, frontier = hierarchical_search(problem)
+            self.assertTrue(is_solved, seed)
+            self.assertReplays(problem, solution)
+            # The refinement is limited to a corridor, so the path may be longer than the optimal one
+            self.assertGreaterEqual(solution.path_cost, uniform_cost_search(random_problem(seed, None))[1].path_cost)
+            self.assertTrue(os.path.exists(f"{map_file}.{CLUSTER_SIZE}.hpa"))
+
+    def test_saved_abstraction_gives_the_same_path(self):
+        map_file = os.path.join(self.folder.name, "map.txt")
+        first = hierarchical_search(random_problem(4, map_file))[1]
+        # A new map object has no cached graph, so its abstraction is loaded from the file
+        problem = random_problem(4, map_file)
+        second = hierarchical_search(problem)[1]
+        self.assertEqual(second.path_cost, first.path_cost)
+        self.assertReplays(problem, second)
+
+
+if __name__ == '__main__':
+    unittest.main()
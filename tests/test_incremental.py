@@ -0,0 +1,71 @@
+# Copyright (C) 2024  Jose Ángel Pérez Garrido
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# Run from the repository root:
+#   python -m unittest tests.test_incremental
+
+import random
+import unittest
+from src.bucketsearch import uniform_cost_search
+from src.incremental import IncrementalPlanner
+from src.miningproblem import MiningProblem
+from src.state import State
+
+
+def small_problem(seed):
+    # Random map of 3x3 to 8x8 cells from the top left corner to the bottom right one
+    rng = random.Random(seed)
+    rows, cols = rng.randint(3, 8), rng.randint(3, 8)
+    matrix = [[rng.randint(1, 9) for _ in range(cols)] for _ in range(rows)]
+    return MiningProblem(State(0, 0, seed % 8), matrix, (rows, cols), None, State(rows - 1, cols - 1, 8))
+
+
+def optimal_cost(problem):
+    # Cost found by a search from scratch on a copy of the current map
+    copy = MiningProblem(problem.initial, [list(row) for row in problem.map], problem.matrix_size, None, problem.goal)
+    return uniform_cost_search(copy)[1].path_cost
+
+
+class IncrementalPlannerTest(unittest.TestCase):
+
+    def test_plan_has_the_optimal_cost(self):
+        for seed in range(30):
+            problem = small_problem(seed)
+            is_solved, solution, _, _ = IncrementalPlanner(problem).plan()
+            self.assertTrue(is_solved, seed)
+            self.assertEqual(solution.path_cost, optimal_cost(problem), seed)
+            self.assertEqual((solution.state.x, solution.state.y), (problem.goal.x, problem.goal.y))
+
+    def test_repaired_plans_have_the_optimal_cost(self):
+        # The robot follows its plan while cells get harder or softer, and every repaired
+        # plan must cost the same as a search from scratch on the new map
+        for seed in range(30):
+            rng = random.Random(seed)
+            problem = small_problem(seed)
+            rows, cols = problem.matrix_size
+            planner = IncrementalPlanner(problem)
+            is_solved, solution, _, _ = planner.plan()
+            for _ in range(5):
+                path = solution.path()
+                position = path[1].state if len(path) > 1 else None
+                # Hardness 1 is below the cheapest move of some maps, which restarts the search
+                changes = {(rng.randrange(rows), rng.randrange(cols)): rng.randint(1, 9) for _ in range(3)}
+                is_solved, solution, _, _ = planner.update(changes, position)
+                self.assertTrue(is_solved, seed)
+                self.assertEqual(solution.path_cost, optimal_cost(problem), seed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+# Copyright (C) 2024  Jose Ángel Pérez Garrido
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# Run from the repository root:
+#   python -m unittest tests.test_macroactions
+
+import random
+import unittest
+from src.bucketsearch import bucket_astar_search, uniform_cost_search
+from src.heuristic_functions import h4, h_perfect
+from src.miningproblem import MiningProblem
+from src.state import State
+
+
+def small_problem(seed, h_function, macro_actions=False):
+    # Random map of 3x3 to 10x10 cells from the top left corner to the bottom right one
+    rng = random.Random(seed)
+    rows, cols = rng.randint(3, 10), rng.randint(3, 10)
+    matrix = [[rng.randint(1, 9) for _ in range(cols)] for _ in range(rows)]
+    return MiningProblem(State(0, 0, seed % 8), matrix, (rows, cols), h_function, State(rows - 1, cols - 1, 8),
+                         macro_actions=macro_actions)
+
+
+class MacroActionsTest(unittest.TestCase):
+
+    def assertReplays(self, problem, solution):
+        # Applying the actions of the solution from the initial state reaches the goal with its cost
+        # (the actions are looked up by name, as the solution may come from another problem)
+        state, cost = problem.initial, 0
+        for node in solution.path()[1:]:
+            by_name = {action.name: action for action in problem.actions(state)}
+            self.assertIn(node.action.name, by_name)
+            action = by_name[node.action.name]
+            new_state = problem.result(state, action)
+            cost = problem.path_cost(cost, state, action, new_state)
+            state = new_state
+            self.assertEqual(state, node.state)
+        self.assertTrue(problem.goal_test(state))
+        self.assertEqual(cost, solution.path_cost)
+
+    def test_same_cost_as_the_basic_actions(self):
+        # Turning by the shortest way before each move loses no path that can be optimal
+        for seed in range(30):
+            optimal = uniform_cost_search(small_problem(seed, None))[1].path_cost
+            for search, h_function in ((uniform_cost_search, None), (bucket_astar_search, h4),
+                                       (bucket_astar_search, h_perfect)):
+                problem = small_problem(seed, h_function, macro_actions=True)
+                is_solved, solution, _, _ = search(problem)
+                self.assertTrue(is_solved, seed)
+                self.assertEqual(solution.path_cost, optimal, (seed, search.__name__))
+                self.assertReplays(problem, solution)
+
+    def test_expanded_solution_replays_with_basic_actions(self):
+        for seed in range(30):
+            problem = small_problem(seed, None, macro_actions=True)
+            solution = uniform_cost_search(problem)[1]
+            expanded = problem.expand_solution(solution)
+            self.assertEqual(expanded.path_cost, solution.path_cost)
+            self.assertTrue(all(node.action.name in ('MoveForwardAction', 'ClockwiseAction', 'CounterClockwiseAction')
+                                for node in expanded.path()[1:]))
+            self.assertReplays(small_problem(seed, None), expanded)
+
+
+if __name__ == '__main__':
+    unittest.main()
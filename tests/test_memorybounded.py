@@ -0,0 +1,93 @@
+# Copyright (C) 2024  Jose Ángel Pérez Garrido
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# Run from the repository root:
+#   python -m unittest tests.test_memorybounded
+
+import random
+import unittest
+from src.bucketsearch import uniform_cost_search
+from src.heuristic_functions import h1, h2, h4, h_perfect
+from src.memorybounded import ida_star_search, sma_star_search
+from src.miningproblem import MiningProblem
+from src.state import State
+
+
+def small_problem(seed, h_function):
+    # Random map of 3x3 to 8x8 cells from the top left corner to the bottom right one
+    rng = random.Random(seed)
+    rows, cols = rng.randint(3, 8), rng.randint(3, 8)
+    matrix = [[rng.randint(1, 9) for _ in range(cols)] for _ in range(rows)]
+    return MiningProblem(State(0, 0, seed % 8), matrix, (rows, cols), h_function, State(rows - 1, cols - 1, 8))
+
+
+class SMAStarTest(unittest.TestCase):
+
+    def test_small_cap_terminates_with_optimal_cost(self):
+        # Caps that keep the optimal path, but not much more, make SMA* forget nodes
+        for seed in range(40):
+            is_solved, optimal, _, _ = uniform_cost_search(small_problem(seed, None))
+            for h_function in (h4, h_perfect):
+                for cap in (optimal.depth + 2, 30):
+                    if cap <= optimal.depth + 1:
+                        continue
+                    is_solved, solution, _, _ = sma_star_search(small_problem(seed, h_function), cap)
+                    self.assertTrue(is_solved, (seed, cap))
+                    self.assertEqual(solution.path_cost, optimal.path_cost, (seed, cap))
+
+    def test_inexact_heuristics_terminate(self):
+        # h1 and h2 reach the same states through many routes, which the table of g prunes
+        for seed in range(40):
+            is_solved, optimal, _, _ = uniform_cost_search(small_problem(seed, None))
+            for h_function in (h1, h2):
+                for cap in (optimal.depth + 2, 30, 100):
+                    is_solved, solution, _, _ = sma_star_search(small_problem(seed, h_function), cap)
+                    self.assertTrue(is_solved, (seed, h_function.__name__, cap))
+                    self.assertGreaterEqual(solution.path_cost, optimal.path_cost)
+
+    def test_inexact_heuristics_on_a_long_map(self):
+        rng = random.Random(3)
+        matrix = [[rng.randint(1, 9) for _ in range(20)] for _ in range(6)]
+        problem = lambda h_function: MiningProblem(State(0, 0, 0), matrix, (6, 20), h_function, State(5, 19, 8))
+        is_solved, optimal, _, _ = uniform_cost_search(problem(None))
+        for h_function in (h1, h2):
+            for cap in (200, 2000):
+                result = sma_star_search(problem(h_function), cap)
+                self.assertTrue(result[0], (h_function.__name__, cap))
+                self.assertGreaterEqual(result[1].path_cost, optimal.path_cost)
+                self.assertLessEqual(result.stats['peak_nodes'], cap)
+
+    def test_frontier_counts_the_leaves_in_memory(self):
+        result = sma_star_search(small_problem(9, h4), 20)
+        self.assertLessEqual(len(result[3]), 20)
+
+    def test_cap_below_solution_depth_fails(self):
+        is_solved, optimal, _, _ = uniform_cost_search(small_problem(5, None))
+        is_solved, _, _, _ = sma_star_search(small_problem(5, h4), optimal.depth // 2)
+        self.assertFalse(is_solved)
+
+
+class IDAStarTest(unittest.TestCase):
+
+    def test_real_valued_heuristic_takes_few_iterations(self):
+        problem = small_problem(7, h1)
+        is_solved, optimal, _, _ = uniform_cost_search(small_problem(7, None))
+        result = ida_star_search(problem)
+        self.assertTrue(result[0])
+        self.assertLessEqual(result.stats['iterations'], optimal.path_cost)
+
+
+if __name__ == '__main__':
+    unittest.main()
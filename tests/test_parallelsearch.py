@@ -0,0 +1,79 @@
+# Copyright (C) 2024  Jose Ángel Pérez Garrido
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# Run from the repository root:
+#   python -m unittest tests.test_parallelsearch
+
+import random
+import unittest
+from unittest import mock
+from aima.search import astar_search
+from src import parallelsearch
+from src.heuristic_functions import h1, h2, h4, h_perfect
+from src.miningproblem import MiningProblem
+from src.parallelsearch import parallel_astar_search
+from src.state import State
+
+
+def random_problem(seed, h_function, size=20):
+    # Random square map from the top left corner to the bottom right one
+    rng = random.Random(seed)
+    matrix = [[rng.randint(1, 9) for _ in range(size)] for _ in range(size)]
+    return MiningProblem(State(0, 0, seed % 8), matrix, (size, size), h_function, State(size - 1, size - 1, 8))
+
+
+class ParallelAStarTest(unittest.TestCase):
+
+    def assertReplays(self, problem, solution):
+        # Applying the actions of the solution from the initial state reaches the goal with its cost
+        state, cost = problem.initial, 0
+        for node in solution.path()[1:]:
+            self.assertIn(node.action.name, [action.name for action in problem.actions(state)])
+            new_state = problem.result(state, node.action)
+            cost = problem.path_cost(cost, state, node.action, new_state)
+            state = new_state
+            self.assertEqual(state, node.state)
+        self.assertTrue(problem.goal_test(state))
+        self.assertEqual(cost, solution.path_cost)
+
+    # Polling after every expansion with batches that are never full makes a busy worker
+    # answer probes while its outboxes hold states, where an early stop used to happen
+    @mock.patch.object(parallelsearch, 'POLL_INTERVAL', 1)
+    def test_repeated_runs_find_the_astar_cost(self):
+        # The end of the search depends on the timing of the workers, so it is run many times
+        for seed in range(4):
+            problem = random_problem(seed, h_perfect)
+            optimal = astar_search(problem, problem.h)[1].path_cost
+            for h_function in (None, h1, h2, h4, h_perfect):
+                name = getattr(h_function, '__name__', None)
+                for run in range(5):
+                    problem = random_problem(seed, h_function)
+                    is_solved, solution, _, _ = parallel_astar_search(problem, workers=2, batch_size=10 ** 6)
+                    self.assertTrue(is_solved, (seed, name, run))
+                    self.assertReplays(problem, solution)
+                    # h1 and h2 overestimate the diagonal moves, so only the admissible ones are optimal
+                    if h_function not in (h1, h2):
+                        self.assertEqual(solution.path_cost, optimal, (seed, name, run))
+
+    def test_more_workers_than_cores(self):
+        problem = random_problem(7, h4, size=12)
+        optimal = astar_search(problem, problem.h)[1].path_cost
+        is_solved, solution, _, _ = parallel_astar_search(random_problem(7, h4, size=12), workers=4)
+        self.assertTrue(is_solved)
+        self.assertEqual(solution.path_cost, optimal)
+
+
+if __name__ == '__main__':
+    unittest.main()
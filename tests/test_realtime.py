@@ -0,0 +1,82 @@
+# Copyright (C) 2024  Jose Ángel Pérez Garrido
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# Run from the repository root:
+#   python -m unittest tests.test_realtime
+
+import random
+import unittest
+from src.bucketsearch import uniform_cost_search
+from src.heuristic_functions import h4
+from src.miningproblem import MiningProblem
+from src.realtime import lrta_star_search
+from src.state import State
+
+
+def small_problem(seed, h_function):
+    # Random map of 3x3 to 8x8 cells from the top left corner to the bottom right one
+    rng = random.Random(seed)
+    rows, cols = rng.randint(3, 8), rng.randint(3, 8)
+    matrix = [[rng.randint(1, 9) for _ in range(cols)] for _ in range(rows)]
+    return MiningProblem(State(0, 0, seed % 8), matrix, (rows, cols), h_function, State(rows - 1, cols - 1, 8))
+
+
+class RealTimeSearchTest(unittest.TestCase):
+
+    def assertReplays(self, problem, solution):
+        # Applying the actions of the solution from the initial state reaches the goal with its cost
+        state, cost = problem.initial, 0
+        for node in solution.path()[1:]:
+            self.assertIn(node.action.name, [action.name for action in problem.actions(state)])
+            new_state = problem.result(state, node.action)
+            cost = problem.path_cost(cost, state, node.action, new_state)
+            state = new_state
+            self.assertEqual(state, node.state)
+        self.assertTrue(problem.goal_test(state))
+        self.assertEqual(cost, solution.path_cost)
+
+    def test_paths_reach_the_goal(self):
+        for seed in range(20):
+            optimal = uniform_cost_search(small_problem(seed, None))[1].path_cost
+            for h_function in (None, h4):
+                for lookahead in (1, 4, 32):
+                    problem = small_problem(seed, h_function)
+                    result = lrta_star_search(problem, lookahead)
+                    self.assertTrue(result[0], (seed, lookahead))
+                    self.assertReplays(problem, result[1])
+                    self.assertEqual(result.stats['optimal_cost'], optimal)
+                    self.assertGreaterEqual(result[1].path_cost, optimal)
+
+    def test_repeated_trials_reach_the_optimal_cost(self):
+        # With an admissible heuristic the learned values converge to the exact costs
+        for seed in range(10):
+            optimal = uniform_cost_search(small_problem(seed, None))[1].path_cost
+            for lookahead in (1, 4, 32):
+                result = lrta_star_search(small_problem(seed, h4), lookahead, trials=60)
+                self.assertEqual(result.stats['trial_costs'][-1], optimal, (seed, lookahead))
+                self.assertEqual(result[1].path_cost, optimal)
+
+    def test_learned_values_are_kept_between_calls(self):
+        # A second call given the values learned by the first one runs like a second trial
+        learned = {}
+        lrta_star_search(small_problem(3, None), 1, learned=learned)
+        self.assertTrue(learned)
+        second = lrta_star_search(small_problem(3, None), 1, learned=learned)
+        both = lrta_star_search(small_problem(3, None), 1, trials=2)
+        self.assertEqual(second.stats['trial_costs'], both.stats['trial_costs'][1:])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+# Copyright (C) 2024  Jose Ángel Pérez Garrido
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+# Run from the repository root:
+#   python -m unittest tests.test_solutioncache
+
+import os
+import random
+import tempfile
+import unittest
+from src.bucketsearch import uniform_cost_search
+from src.drillrobot import DrillRobot
+from src.solutioncache import SolutionCache
+
+
+def write_map(filename, seed, size=6):
+    # Random square map from the top left corner to the bottom right one
+    rng = random.Random(seed)
+    with open(filename, 'w') as fp:
+        fp.write(f"{size} {size}\n")
+        for _ in range(size):
+            fp.write(" ".join(str(rng.randint(1, 9)) for _ in range(size)) + "\n")
+        fp.write(f"0 0 {seed % 8}\n{size - 1} {size - 1} 8\n")
+
+
+class SolutionCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.folder = folder.name
+        self.cache = SolutionCache(os.path.join(self.folder, 'cache.sqlite'), max_entries=3)
+        self.addCleanup(self.cache.close)
+
+    def map_file(self, name, seed):
+        filename = os.path.join(self.folder, name)
+        write_map(filename, seed)
+        return filename
+
+    def solve_and_put(self, agent, options=None):
+        result = agent.solve(uniform_cost_search, stats_only=True)
+        self.cache.put(agent, 'uniform', None, options or {}, result)
+        return result
+
+    def test_cached_solution_is_rebuilt(self):
+        agent = DrillRobot(self.map_file('map.txt', 1))
+        self.assertIsNone(self.cache.get(agent, 'uniform'))
+        result = self.solve_and_put(agent)
+
+        cached = self.cache.get(DrillRobot(agent.map_file), 'uniform')
+        self.assertIsNotNone(cached)
+        self.assertEqual(cached[0], result[0])
+        self.assertEqual(cached[1].path_cost, result[1].path_cost)
+        self.assertEqual([action.name for action in cached[1].solution()],
+                         [action.name for action in result[1].solution()])
+        self.assertEqual((len(cached[2]), len(cached[3])), (len(result[2]), len(result[3])))
+        self.assertEqual(cached.stats, result.stats)
+
+    def test_key_includes_method_and_options(self):
+        agent = DrillRobot(self.map_file('map.txt', 2))
+        self.solve_and_put(agent, {'macro_actions': True})
+        self.assertIsNone(self.cache.get(agent, 'uniform'))
+        self.assertIsNone(self.cache.get(agent, 'astar', None, {'macro_actions': True}))
+        self.assertIsNotNone(self.cache.get(agent, 'uniform', None, {'macro_actions': True}))
+
+    def test_changed_map_is_not_used(self):
+        filename = self.map_file('map.txt', 3)
+        self.solve_and_put(DrillRobot(filename))
+        write_map(filename, 4)
+        agent = DrillRobot(filename)
+        self.assertIsNone(self.cache.get(agent, 'uniform'))
+        # Storing the new content deletes the solutions of the old one
+        self.solve_and_put(agent)
+        rows = self.cache.db.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+        self.assertEqual(rows, 1)
+
+    def test_least_recently_used_are_deleted(self):
+        agents = [DrillRobot(self.map_file(f"map{i}.txt", i)) for i in range(4)]
+        for agent in agents[:3]:
+            self.solve_and_put(agent)
+        # Using the first solution makes the second one the least recently used
+        self.assertIsNotNone(self.cache.get(agents[0], 'uniform'))
+        self.solve_and_put(agents[3])
+        self.assertIsNone(self.cache.get(agents[1], 'uniform'))
+        for agent in (agents[0], agents[2], agents[3]):
+            self.assertIsNotNone(self.cache.get(agent, 'uniform'))
+
+
+if __name__ == '__main__':
+    unittest.main()